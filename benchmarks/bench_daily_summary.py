@@ -0,0 +1,64 @@
+#Daily forecast aggregation: the original per item python loop against the vectorized
+#ColumnarForecast version that Forecast.get_daily_summary now uses, for 5 day / 3 hourly up to 16 day / hourly series
+#Run with: python -m benchmarks.bench_daily_summary
+import timeit
+from datetime import timedelta, timezone
+
+from benchmarks.payloads import forecast_payload
+from weather_app.backend.services.api import Forecast, ForecastItem, parse_forecast
+from weather_app.backend.services.columnar import ColumnarForecast
+
+
+def measure(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def objects_daily_summary(forecast: Forecast) -> list[dict]:
+    #the pre-columnar implementation, bucketing in the city's timezone like the current one
+    tz = timezone(timedelta(seconds=forecast.timezone_offset))
+    daily: dict[str, list[ForecastItem]] = {}
+    for item in forecast.items:
+        daily.setdefault(item.timestamp.astimezone(tz).strftime("%Y-%m-%d"), []).append(item)
+
+    summaries = []
+    for date_str, items in daily.items():
+        temps = [i.temperature_celsius for i in items]
+        noon_item = min(items, key=lambda x: abs(x.timestamp.astimezone(tz).hour - 12))
+
+        temp_min_c = min(temps)
+        temp_max_c = max(temps)
+        summaries.append({
+            "date": date_str,
+            "date_short": date_str[5:],
+            "temp_min_c": temp_min_c,
+            "temp_max_c": temp_max_c,
+            "temp_min_f": round(temp_min_c * 9/5 + 32, 1),
+            "temp_max_f": round(temp_max_c * 9/5 + 32, 1),
+            "condition": noon_item.condition.main,
+            "description": noon_item.condition.description,
+            "icon": noon_item.condition.icon,
+            "icon_url": noon_item.icon_url,
+            "humidity_avg": round(sum(i.humidity for i in items) / len(items)),
+            "precipitation_prob": max(i.precipitation_probability for i in items),
+        })
+
+    return summaries
+
+
+def main():
+    for items in (40, 120, 384, 2000):
+        forecast = parse_forecast(forecast_payload(items))
+        columnar = ColumnarForecast.from_forecast(forecast)
+        assert columnar.get_daily_summary() == objects_daily_summary(forecast)
+
+        rows = measure(lambda: objects_daily_summary(forecast), 200)
+        vectorized = measure(columnar.get_daily_summary, 200)
+        build = measure(lambda: ColumnarForecast.from_forecast(forecast), 200)
+        print(
+            f"{items:>5} items  objects {rows:8.1f}us  columnar {vectorized:8.1f}us"
+            f"  ({rows / vectorized:.1f}x, building the columns {build:.1f}us)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#Memory used by cached forecasts: plain dataclasses with one WeatherCondition per item (the
+#old representation) against slotted models with interned conditions
+#Run with: python -m benchmarks.bench_memory
+import gc
+import json
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+
+from benchmarks.payloads import forecast_payload
+from weather_app.backend.services.api import parse_forecast
+
+
+@dataclass
+class LegacyWeatherCondition:
+    id: int
+    main: str
+    description: str
+    icon: str
+
+
+@dataclass
+class LegacyForecastItem:
+    timestamp: datetime
+    temperature_kelvin: float
+    feels_like_kelvin: float
+    temp_min_kelvin: float
+    temp_max_kelvin: float
+    humidity: int
+    pressure: int
+    wind_speed: float
+    wind_deg: int
+    clouds: int
+    condition: LegacyWeatherCondition
+    precipitation_probability: float
+
+
+@dataclass
+class LegacyForecast:
+    location_name: str
+    country: str
+    latitude: float
+    longitude: float
+    items: list[LegacyForecastItem]
+
+
+def legacy_parse_forecast(raw: bytes) -> LegacyForecast:
+    data = json.loads(raw)
+    items = []
+    for item_data in data["list"]:
+        items.append(LegacyForecastItem(
+            timestamp=datetime.fromtimestamp(item_data["dt"]),
+            temperature_kelvin=item_data["main"]["temp"],
+            feels_like_kelvin=item_data["main"]["feels_like"],
+            temp_min_kelvin=item_data["main"]["temp_min"],
+            temp_max_kelvin=item_data["main"]["temp_max"],
+            humidity=item_data["main"]["humidity"],
+            pressure=item_data["main"]["pressure"],
+            wind_speed=item_data["wind"]["speed"],
+            wind_deg=item_data["wind"].get("deg", 0),
+            clouds=item_data["clouds"]["all"],
+            condition=LegacyWeatherCondition(**item_data["weather"][0]),
+            precipitation_probability=item_data.get("pop", 0.0),
+        ))
+    return LegacyForecast(
+        location_name=data["city"]["name"],
+        country=data["city"]["country"],
+        latitude=data["city"]["coord"]["lat"],
+        longitude=data["city"]["coord"]["lon"],
+        items=items,
+    )
+
+
+def measure(parse, payloads: list[bytes]) -> int:
+    #bytes still allocated while every parsed forecast is kept alive, like a warm cache
+    gc.collect()
+    tracemalloc.start()
+    kept = [parse(raw) for raw in payloads]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return current
+
+
+def main():
+    count = 2000
+    #distinct coordinates so nothing is shared between forecasts except conditions
+    payloads = [
+        json.dumps(forecast_payload(40, latitude=i / 100, longitude=i / 100)).encode()
+        for i in range(count)
+    ]
+    legacy = measure(legacy_parse_forecast, payloads)
+    compact = measure(parse_forecast, payloads)
+    print(f"{count} cached forecasts x 40 items")
+    print(f"  legacy dataclasses      {legacy / 1e6:8.1f} MB  ({legacy / count / 40:6.0f} B/item)")
+    print(f"  slotted + interned      {compact / 1e6:8.1f} MB  ({compact / count / 40:6.0f} B/item)")
+    print(f"  saved                   {(1 - compact / legacy) * 100:7.1f} %")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#Compares the compiled response parser against the hand written parsing it replaced
+#Run with: python -m benchmarks.bench_parsing
+import json
+import timeit
+from datetime import datetime, timezone
+
+from benchmarks.payloads import current_weather_payload, forecast_payload
+from weather_app.backend.services.api import (
+    CurrentWeather,
+    Forecast,
+    ForecastItem,
+    WeatherCondition,
+    parse_current_weather,
+    parse_forecast,
+)
+from weather_app.backend.services.parsing import loads
+
+
+def legacy_parse_condition(weather_data: dict) -> WeatherCondition:
+    return WeatherCondition(
+        id=weather_data["id"],
+        main=weather_data["main"],
+        description=weather_data["description"],
+        icon=weather_data["icon"],
+    )
+
+
+def legacy_parse_current_weather(raw: bytes) -> CurrentWeather:
+    data = json.loads(raw)
+    return CurrentWeather(
+        location_name=data["name"],
+        country=data["sys"]["country"],
+        latitude=data["coord"]["lat"],
+        longitude=data["coord"]["lon"],
+        temperature_kelvin=data["main"]["temp"],
+        feels_like_kelvin=data["main"]["feels_like"],
+        temp_min_kelvin=data["main"]["temp_min"],
+        temp_max_kelvin=data["main"]["temp_max"],
+        humidity=data["main"]["humidity"],
+        pressure=data["main"]["pressure"],
+        visibility=data.get("visibility", 0),
+        wind_speed=data["wind"]["speed"],
+        wind_deg=data["wind"].get("deg", 0),
+        clouds=data["clouds"]["all"],
+        condition=legacy_parse_condition(data["weather"][0]),
+        sunrise=datetime.fromtimestamp(data["sys"]["sunrise"]),
+        sunset=datetime.fromtimestamp(data["sys"]["sunset"]),
+        timestamp=datetime.fromtimestamp(data["dt"]),
+    )
+
+
+def legacy_parse_forecast(raw: bytes) -> Forecast:
+    data = json.loads(raw)
+    items = []
+    for item_data in data["list"]:
+        items.append(ForecastItem(
+            timestamp=datetime.fromtimestamp(item_data["dt"], timezone.utc),
+            temperature_kelvin=item_data["main"]["temp"],
+            feels_like_kelvin=item_data["main"]["feels_like"],
+            temp_min_kelvin=item_data["main"]["temp_min"],
+            temp_max_kelvin=item_data["main"]["temp_max"],
+            humidity=item_data["main"]["humidity"],
+            pressure=item_data["main"]["pressure"],
+            wind_speed=item_data["wind"]["speed"],
+            wind_deg=item_data["wind"].get("deg", 0),
+            clouds=item_data["clouds"]["all"],
+            condition=legacy_parse_condition(item_data["weather"][0]),
+            precipitation_probability=item_data.get("pop", 0.0),
+        ))
+
+    return Forecast(
+        location_name=data["city"]["name"],
+        country=data["city"]["country"],
+        latitude=data["city"]["coord"]["lat"],
+        longitude=data["city"]["coord"]["lon"],
+        items=items,
+        timezone_offset=data["city"].get("timezone", 0),
+    )
+
+
+def measure(fn, raw: bytes, number: int) -> float:
+    #best of 5 runs, in microseconds per response
+    return min(timeit.repeat(lambda: fn(raw), number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    print(f"decoder: {loads.__module__}")
+    cases = [
+        ("current weather", json.dumps(current_weather_payload()).encode(),
+         legacy_parse_current_weather, parse_current_weather, 20000),
+        ("forecast 40 items", json.dumps(forecast_payload(40)).encode(),
+         legacy_parse_forecast, parse_forecast, 2000),
+        ("forecast 384 items (16 days hourly)", json.dumps(forecast_payload(384)).encode(),
+         legacy_parse_forecast, parse_forecast, 200),
+    ]
+    for name, raw, legacy, compiled, number in cases:
+        assert legacy(raw) == compiled(raw)
+        before = measure(legacy, raw, number)
+        after = measure(compiled, raw, number)
+        print(f"{name:<38} legacy {before:9.1f}us  compiled {after:9.1f}us  ({before / after:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+#Local stand-in for the OpenWeatherMap endpoints the app uses (/weather, /forecast and
+#geo/1.0/direct), so load tests and benchmarks don't spend API quota. Run with:
+#  python -m benchmarks.fake_owm --port 8765 --latency 0.05 --error-rate 0.01
+#and point the app at it:
+#  WEATHER_API_BASE_URL=http://127.0.0.1:8765/data/2.5
+#  GEOCODING_API_URL=http://127.0.0.1:8765/geo/1.0/direct
+#--record DIR proxies to the real API and saves every response, --replay DIR only serves saved ones
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import httpx
+
+from benchmarks.payloads import current_weather_payload, forecast_payload
+from weather_app.backend.services.gazetteer import Gazetteer, GazetteerEntry, load_gazetteer
+
+UPSTREAM = "https://api.openweathermap.org"
+#statuses used for injected errors, the ones the client treats as transient
+ERROR_STATUSES = (429, 500, 502, 503)
+#how far a coordinate lookup still reports the nearest bundled city's name
+NEAREST_CITY_KM = 50.0
+
+
+class FakeOpenWeatherMap:
+    #Builds responses for the three endpoints. "synthetic" makes them up from the bundled
+    #gazetteer, "record" proxies to the real API and saves them, "replay" serves saved ones
+
+    def __init__(
+        self,
+        mode: str = "synthetic",
+        directory: Optional[str] = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None,
+        gazetteer: Optional[Gazetteer] = None,
+    ):
+        if mode not in ("synthetic", "record", "replay"):
+            raise ValueError(f"Unknown mode {mode!r}")
+        if mode != "synthetic" and not directory:
+            raise ValueError(f"{mode} mode needs a directory")
+
+        self.mode = mode
+        self.directory = Path(directory) if directory else None
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.gazetteer = gazetteer or load_gazetteer()
+        self.requests = 0
+        self.injected_errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._upstream: Optional[httpx.Client] = None
+
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        if mode == "record":
+            self._upstream = httpx.Client(base_url=UPSTREAM, timeout=10.0)
+
+    def respond(self, path: str, params: dict) -> tuple[int, bytes]:
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            fail = self._random.random() < self.error_rate
+            status = self._random.choice(ERROR_STATUSES)
+            if fail:
+                self.injected_errors += 1
+
+        if delay:
+            time.sleep(delay)
+        if fail:
+            return status, json.dumps({"cod": status, "message": "injected error"}).encode()
+
+        if self.mode == "replay":
+            return self._replay(path, params)
+        if self.mode == "record":
+            return self._record(path, params)
+        return self._synthetic(path, params)
+
+    def _recording(self, path: str, params: dict) -> Path:
+        #the api key isn't part of the recording, replays work with any key
+        query = urlencode(sorted((k, v) for k, v in params.items() if k != "appid"))
+        digest = hashlib.sha1(f"{path}?{query}".encode()).hexdigest()
+        return self.directory / f"{digest}.json"
+
+    def _replay(self, path: str, params: dict) -> tuple[int, bytes]:
+        try:
+            saved = json.loads(self._recording(path, params).read_text(encoding="utf-8"))
+        except OSError:
+            return 404, json.dumps({"cod": "404", "message": "not recorded"}).encode()
+        return saved["status"], saved["body"].encode()
+
+    def _record(self, path: str, params: dict) -> tuple[int, bytes]:
+        response = self._upstream.get(path, params=params)
+        recording = {"path": path, "status": response.status_code, "body": response.text}
+        self._recording(path, params).write_text(json.dumps(recording), encoding="utf-8")
+        return response.status_code, response.content
+
+    def _find(self, params: dict) -> Optional[tuple[float, float, str, str]]:
+        #(latitude, longitude, name, country) for a "q" or "lat"/"lon" query
+        if "q" in params:
+            name, _, country = params["q"].partition(",")
+            matches = [
+                entry for entry in self.gazetteer.search(name, 20)
+                if not country.strip() or entry.country.lower() == country.strip().lower()
+            ]
+            if not matches:
+                return None
+            entry = matches[0]
+            return entry.latitude, entry.longitude, entry.name, entry.country
+
+        try:
+            latitude, longitude = float(params["lat"]), float(params["lon"])
+        except (KeyError, ValueError):
+            return None
+        entry = self.gazetteer.nearest(latitude, longitude, NEAREST_CITY_KM)
+        if entry is None:
+            return latitude, longitude, "", ""
+        return latitude, longitude, entry.name, entry.country
+
+    def _synthetic(self, path: str, params: dict) -> tuple[int, bytes]:
+        if path.endswith("/geo/1.0/direct"):
+            limit = int(params.get("limit", 5))
+            return 200, json.dumps([
+                _geo_result(entry) for entry in self.gazetteer.search(params.get("q", ""), limit)
+            ]).encode()
+
+        if not path.endswith(("/weather", "/forecast")):
+            return 404, json.dumps({"cod": "404", "message": "Internal error"}).encode()
+
+        place = self._find(params)
+        if place is None:
+            return 404, json.dumps({"cod": "404", "message": "city not found"}).encode()
+        latitude, longitude, name, country = place
+
+        if path.endswith("/weather"):
+            payload = current_weather_payload(latitude, longitude, name, country)
+        else:
+            payload = forecast_payload(int(params.get("cnt", 40)), latitude, longitude, name, country)
+        return 200, json.dumps(payload).encode()
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "injected_errors": self.injected_errors}
+
+
+def _geo_result(entry: GazetteerEntry) -> dict:
+    result = {
+        "name": entry.name,
+        "lat": entry.latitude,
+        "lon": entry.longitude,
+        "country": entry.country,
+    }
+    if entry.state:
+        result["state"] = entry.state
+    return result
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        status, body = self.server.app.respond(url.path, dict(parse_qsl(url.query)))
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(app: FakeOpenWeatherMap, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    #Starts the server on a daemon thread and returns it, port 0 picks a free port.
+    #Call shutdown() on the result to stop it
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.app = app
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def base_urls(server: ThreadingHTTPServer) -> tuple[str, str]:
+    #(weather_api_base_url, geocoding_api_url) for a running server
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}/data/2.5", f"http://{host}:{port}/geo/1.0/direct"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenWeatherMap stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra latency, up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 429/5xx")
+    parser.add_argument("--seed", type=int, default=None)
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--record", metavar="DIR", help="proxy to the real API and save responses in DIR")
+    mode.add_argument("--replay", metavar="DIR", help="only serve responses saved in DIR")
+    args = parser.parse_args()
+
+    app = FakeOpenWeatherMap(
+        mode="record" if args.record else "replay" if args.replay else "synthetic",
+        directory=args.record or args.replay,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    server = serve(app, args.host, args.port)
+    weather_url, geo_url = base_urls(server)
+    print(f"WEATHER_API_BASE_URL={weather_url}")
+    print(f"GEOCODING_API_URL={geo_url}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(app.stats())
+
+
+if __name__ == "__main__":
+    main()
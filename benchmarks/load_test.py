@@ -0,0 +1,246 @@
+#Load generator for the WeatherState event handlers. Every simulated session is a socket.io
+#client speaking the same event protocol as the browser, so the numbers include the state
+#manager, delta computation and serialization of a real Reflex worker. Run each in its own shell:
+#  python -m benchmarks.fake_owm --latency 0.05
+#  WEATHER_API_BASE_URL=http://127.0.0.1:8765/data/2.5 GEOCODING_API_URL=http://127.0.0.1:8765/geo/1.0/direct \
+#      reflex run --env prod --backend-only
+#  python -m benchmarks.load_test --url http://localhost:8000 --sessions 50 --duration 60
+#Run the generator on other cores (or another machine) than the worker, or it competes for CPU
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+from collections import defaultdict
+from typing import Optional
+
+import socketio
+
+#sets the dummy API key before the settings load, the state module is only imported for names
+import benchmarks.payloads
+
+ROUTER_DATA = {"pathname": "/", "query": {}, "asPath": "/"}
+#each session types one of these, picks the first suggestion, saves it and opens the history
+QUERIES = ["Lon", "Par", "Tok", "Ber", "Mad", "Syd", "Tor", "Mum"]
+#WeatherState handlers declared with @rx.event(background=True). Reflex acknowledges them at once
+#and the task pushes its own updates later, so they are timed from those updates instead
+BACKGROUND_EVENTS = {"autocomplete"}
+
+
+class Stats:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    def record(self, event: str, seconds: float, error: bool = False) -> None:
+        self.latencies[event].append(seconds)
+        if error:
+            self.errors[event] += 1
+
+    def report(self, duration: float) -> str:
+        lines = [
+            f"{'event':<24}{'count':>8}{'errors':>8}{'per sec':>10}"
+            f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+        ]
+        for event, samples in sorted(self.latencies.items()):
+            if len(samples) > 1:
+                centiles = statistics.quantiles(samples, n=100, method="inclusive")
+                p50, p95, p99 = centiles[49], centiles[94], centiles[98]
+            else:
+                p50 = p95 = p99 = samples[0]
+            lines.append(
+                f"{event:<24}{len(samples):>8}{self.errors[event]:>8}{len(samples) / duration:>10.1f}"
+                f"{p50 * 1000:>10.1f}{p95 * 1000:>10.1f}{p99 * 1000:>10.1f}{max(samples) * 1000:>10.1f}"
+            )
+        return "\n".join(lines)
+
+
+class Session:
+    #One browser tab: sends an event, waits for its final update and sends back the events the
+    #handler chained (like the frontend queue does), timing every server side event on its own
+
+    def __init__(self, url: str, state_name: str, hydrate_event: str, stats: Stats, timeout: float):
+        self.url = url
+        self.state_name = state_name
+        self.hydrate_event = hydrate_event
+        self.stats = stats
+        self.timeout = timeout
+        self.token = str(uuid.uuid4())
+        self.suggestions: list[dict] = []
+        self.searching = False
+        self._client = socketio.AsyncClient(reconnection=False)
+        #updates of the event being sent, and the ones pushed by background tasks (final is null)
+        self._updates: asyncio.Queue = asyncio.Queue()
+        self._background_updates: asyncio.Queue = asyncio.Queue()
+        self._client.on("event", self._on_update, namespace="/_event")
+
+    async def _on_update(self, data):
+        if isinstance(data, str):
+            data = json.loads(data)
+        if data.get("final", True) is None:
+            self._background_updates.put_nowait(data)
+        else:
+            self._updates.put_nowait(data)
+
+    async def connect(self) -> None:
+        #the backend only routes updates to a socket that announced its token when connecting
+        await self._client.connect(
+            f"{self.url}?token={self.token}",
+            socketio_path="/_event",
+            namespaces=["/_event"],
+            transports=["websocket"],
+        )
+        await self.dispatch(self.hydrate_event, {})
+
+    async def close(self) -> None:
+        await self._client.disconnect()
+
+    def _state_delta(self, update: dict) -> dict:
+        #delta keys carry a "_rx_state_" suffix, strip it back to the var names
+        delta = update.get("delta", {}).get(self.state_name, {})
+        return {key.removesuffix("_rx_state_"): value for key, value in delta.items()}
+
+    def _apply(self, delta: dict) -> None:
+        if "is_searching" in delta:
+            self.searching = delta["is_searching"]
+        if "location_suggestions" in delta:
+            self.suggestions = delta["location_suggestions"]
+
+    async def _send(self, name: str, payload: dict) -> list[dict]:
+        #returns the events chained by the handler, once its final update arrived
+        event = name.rsplit(".", 1)[-1]
+        started = time.perf_counter()
+        await self._client.emit("event", {
+            "name": name,
+            "payload": payload,
+            "token": self.token,
+            "router_data": ROUTER_DATA,
+        }, namespace="/_event")
+
+        chained, error = [], False
+        while True:
+            update = await asyncio.wait_for(self._updates.get(), self.timeout)
+            delta = self._state_delta(update)
+            error = error or bool(delta.get("error_message"))
+            self._apply(delta)
+            chained.extend(update.get("events", []))
+            if update.get("final", True):
+                break
+
+        #the final update of a background event is only its acknowledgement
+        if event not in BACKGROUND_EVENTS:
+            self.stats.record(event, time.perf_counter() - started, error)
+        return chained
+
+    async def dispatch(self, name: str, payload: dict) -> None:
+        queue = [(name, payload)]
+        while queue:
+            name, payload = queue.pop(0)
+            for event in await self._send(name, payload):
+                #names starting with "_" are frontend actions (scripts, downloads...), not handlers
+                if not event["name"].startswith("_"):
+                    queue.append((event["name"], event.get("payload", {})))
+
+    def discard_background_updates(self) -> None:
+        #leftovers of superseded or timed out lookups, so they can't end the next wait early
+        while not self._background_updates.empty():
+            self._background_updates.get_nowait()
+
+    async def wait_for_suggestions(self, started: float) -> None:
+        #autocomplete runs as a background task: on_search_change sets is_searching and the
+        #task of the last keystroke clears it once its suggestions are in, earlier keystrokes'
+        #tasks are cancelled. Nothing is timed when the query was too short for a lookup
+        if not self.searching:
+            return
+        deadline = started + self.timeout
+        while self.searching and time.perf_counter() < deadline:
+            try:
+                update = await asyncio.wait_for(
+                    self._background_updates.get(), deadline - time.perf_counter()
+                )
+            except asyncio.TimeoutError:
+                break
+            self._apply(self._state_delta(update))
+        self.stats.record("autocomplete", time.perf_counter() - started, self.searching)
+
+    async def run_scenario(self, query: str, think_time: float) -> None:
+        handler = f"{self.state_name}."
+        self.suggestions = []
+        self.discard_background_updates()
+        for end in range(2, len(query) + 1):
+            typed = time.perf_counter()
+            await self.dispatch(handler + "on_search_change", {"value": query[:end]})
+        await self.wait_for_suggestions(typed)
+        await asyncio.sleep(think_time)
+
+        if self.suggestions:
+            #select_location chains fetch_weather, which is timed as its own event
+            await self.dispatch(handler + "select_location", {"location": self.suggestions[0]})
+            await asyncio.sleep(think_time)
+            await self.dispatch(handler + "save_weather_record", {})
+            await asyncio.sleep(think_time)
+
+        #open the history (chains load_weather_records) and close it again
+        await self.dispatch(handler + "toggle_history", {})
+        await asyncio.sleep(think_time)
+        await self.dispatch(handler + "toggle_history", {})
+        await asyncio.sleep(think_time)
+
+
+async def run_session(index: int, args, state_name: str, hydrate_event: str, stats: Stats, end: float):
+    #sessions start spread over the ramp up instead of all connecting at once
+    await asyncio.sleep(args.ramp_up * index / max(1, args.sessions))
+    session = Session(args.url, state_name, hydrate_event, stats, args.timeout)
+    try:
+        await session.connect()
+        iteration = 0
+        while time.perf_counter() < end:
+            await session.run_scenario(QUERIES[(index + iteration) % len(QUERIES)], args.think_time)
+            iteration += 1
+    except (asyncio.TimeoutError, socketio.exceptions.SocketIOError) as e:
+        stats.record("session_failed", 0.0, True)
+        print(f"session {index} stopped: {e!r}")
+    finally:
+        await session.close()
+
+
+def event_names(state_name: Optional[str]) -> tuple[str, str]:
+    #full names of WeatherState and of the hydrate event, as the frontend sends them
+    from reflex import constants
+    from reflex.state import State
+
+    if state_name is None:
+        from weather_app.frontend.state import WeatherState
+        state_name = WeatherState.get_full_name()
+    return state_name, f"{State.get_full_name()}.{constants.CompileVars.HYDRATE}"
+
+
+async def main_async(args) -> None:
+    state_name, hydrate_event = event_names(args.state)
+    stats = Stats()
+    started = time.perf_counter()
+    end = started + args.ramp_up + args.duration
+    await asyncio.gather(*(
+        run_session(i, args, state_name, hydrate_event, stats, end)
+        for i in range(args.sessions)
+    ))
+    duration = time.perf_counter() - started
+    print(f"{args.sessions} sessions for {duration:.0f}s against {args.url}")
+    print(stats.report(duration))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the WeatherState event handlers")
+    parser.add_argument("--url", default="http://localhost:8000", help="Reflex backend url")
+    parser.add_argument("--sessions", type=int, default=20, help="concurrent browser sessions")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds to run after the ramp up")
+    parser.add_argument("--ramp-up", type=float, default=10.0, help="seconds over which sessions connect")
+    parser.add_argument("--think-time", type=float, default=0.5, help="pause between user actions")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for an update")
+    parser.add_argument("--state", default=None, help="full WeatherState name, read from the app by default")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import os
+import time
+
+#settings need an api key to load, benchmarks never call the real API
+os.environ.setdefault("OPEN_WEATHER_MAP_API_KEY", "benchmark")
+
+CONDITIONS = [
+    (800, "Clear", "clear sky", "01d"),
+    (801, "Clouds", "few clouds", "02d"),
+    (803, "Clouds", "broken clouds", "04d"),
+    (500, "Rain", "light rain", "10d"),
+    (501, "Rain", "moderate rain", "10n"),
+]
+
+
+def current_weather_payload(
+    latitude: float = 51.5085,
+    longitude: float = -0.1257,
+    name: str = "London",
+    country: str = "GB",
+) -> dict:
+    now = int(time.time())
+    return {
+        "coord": {"lon": longitude, "lat": latitude},
+        "weather": [{"id": 803, "main": "Clouds", "description": "broken clouds", "icon": "04d"}],
+        "base": "stations",
+        "main": {
+            "temp": 288.47,
+            "feels_like": 287.91,
+            "temp_min": 287.04,
+            "temp_max": 289.82,
+            "pressure": 1015,
+            "humidity": 72,
+            "sea_level": 1015,
+            "grnd_level": 1011,
+        },
+        "visibility": 10000,
+        "wind": {"speed": 4.63, "deg": 240, "gust": 8.2},
+        "clouds": {"all": 75},
+        "dt": now,
+        "sys": {"type": 2, "id": 2075535, "country": country, "sunrise": now - 21600, "sunset": now + 21600},
+        "timezone": 3600,
+        "id": 2643743,
+        "name": name,
+        "cod": 200,
+    }
+
+
+def forecast_payload(
+    items: int = 40,
+    latitude: float = 51.5085,
+    longitude: float = -0.1257,
+    name: str = "London",
+    country: str = "GB",
+) -> dict:
+    start = int(time.time()) // 10800 * 10800
+    entries = []
+    for i in range(items):
+        condition_id, main, description, icon = CONDITIONS[i % len(CONDITIONS)]
+        temp = 280.0 + (i % 8) * 1.3
+        entries.append({
+            "dt": start + i * 10800,
+            "main": {
+                "temp": temp,
+                "feels_like": temp - 1.2,
+                "temp_min": temp - 0.6,
+                "temp_max": temp + 0.4,
+                "pressure": 1012,
+                "sea_level": 1012,
+                "grnd_level": 1008,
+                "humidity": 60 + i % 30,
+                "temp_kf": 0.0,
+            },
+            "weather": [{"id": condition_id, "main": main, "description": description, "icon": icon}],
+            "clouds": {"all": (i * 7) % 100},
+            "wind": {"speed": 3.2 + (i % 5) * 0.4, "deg": (i * 37) % 360, "gust": 6.1},
+            "visibility": 10000,
+            "pop": round((i % 6) / 6, 2),
+            "sys": {"pod": "d" if i % 8 < 4 else "n"},
+            "dt_txt": time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(start + i * 10800)),
+        })
+    return {
+        "cod": "200",
+        "message": 0,
+        "cnt": items,
+        "list": entries,
+        "city": {
+            "id": 2643743,
+            "name": name,
+            "coord": {"lat": latitude, "lon": longitude},
+            "country": country,
+            "population": 1000000,
+            "timezone": 3600,
+            "sunrise": start,
+            "sunset": start + 30000,
+        },
+    }
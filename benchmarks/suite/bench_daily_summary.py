@@ -0,0 +1,17 @@
+import pytest
+
+from benchmarks.payloads import forecast_payload
+from weather_app.backend.services.api import parse_forecast
+
+
+@pytest.mark.benchmark(group="daily summary")
+@pytest.mark.parametrize("items", [40, 120, 384])
+def bench_daily_summary(benchmark, items):
+    forecast = parse_forecast(forecast_payload(items))
+
+    def summarize():
+        #the summary is memoized on the forecast, clear it so every round does the work
+        forecast._daily_summary = None
+        return forecast.get_daily_summary()
+
+    benchmark(summarize)
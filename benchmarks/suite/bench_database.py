@@ -0,0 +1,155 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from weather_app.backend.models.models import WeatherRecord
+from weather_app.backend.services import database
+from weather_app.backend.services.database import (
+    _encode_cursor,
+    bulk_create_weather_records,
+    bulk_delete_weather_records,
+    bulk_update_weather_records,
+    create_weather_record,
+    delete_weather_record,
+    get_all_weather_records,
+    get_weather_records_page,
+    update_weather_record,
+)
+from weather_app.backend.services.export import EXPORT_FORMATS, export_records
+
+#rows per round in the per row against bulk comparisons
+BULK_COUNT = 1000
+
+
+@pytest.mark.benchmark(group="create_weather_record")
+def bench_create_weather_record(benchmark, scratch_db):
+    today = date.today()
+    benchmark(
+        create_weather_record,
+        location_name="London, GB",
+        latitude=51.5085,
+        longitude=-0.1257,
+        date_from=today,
+        date_to=today,
+        temperature_kelvin=288.47,
+        temperature_feels_like=287.91,
+        humidity=72,
+        description="broken clouds",
+        icon_code="04d",
+        wind_speed=4.63,
+    )
+
+
+@pytest.mark.benchmark(group="get_all_weather_records")
+def bench_get_all_weather_records(measure):
+    measure(get_all_weather_records)
+
+
+@pytest.mark.benchmark(group="load_weather_records")
+def bench_load_weather_records(measure):
+    #the dict building loop of WeatherState.load_weather_records, without the query
+    pytest.importorskip("reflex")
+    from weather_app.frontend.state import _record_to_dict
+
+    records = get_all_weather_records()
+    measure(lambda: [_record_to_dict(r) for r in records])
+
+
+@pytest.mark.benchmark(group="get_weather_records_page")
+@pytest.mark.parametrize("page", ["first", "middle"])
+def bench_get_weather_records_page(benchmark, records_db, page):
+    cursor = None
+    if page == "middle":
+        with Session(records_db) as session:
+            middle = session.exec(
+                select(WeatherRecord)
+                .order_by(WeatherRecord.created_at.desc(), WeatherRecord.id.desc())
+                .offset(records_db.rows // 2)
+            ).first()
+        cursor = _encode_cursor(middle)
+    benchmark(get_weather_records_page, 50, cursor)
+
+
+def _new_records(count: int) -> list[dict]:
+    today = date.today()
+    return [
+        {
+            "location_name": "London, GB",
+            "latitude": 51.5085,
+            "longitude": -0.1257,
+            "date_from": today,
+            "date_to": today,
+            "temperature_kelvin": 288.47,
+            "temperature_feels_like": 287.91,
+            "humidity": 72,
+            "description": "broken clouds",
+            "icon_code": "04d",
+            "wind_speed": 4.63,
+        }
+        for _ in range(count)
+    ]
+
+
+def _inserted_ids(count: int) -> list[int]:
+    #inserts fresh rows to be updated or deleted and returns their ids
+    with Session(database.engine) as session:
+        last_id = session.exec(select(func.max(WeatherRecord.id))).one() or 0
+    bulk_create_weather_records(_new_records(count))
+    return list(range(last_id + 1, last_id + count + 1))
+
+
+@pytest.mark.benchmark(group="insert 1000 records")
+def bench_insert_per_row(benchmark, scratch_db):
+    records = _new_records(BULK_COUNT)
+    benchmark.pedantic(lambda: [create_weather_record(**r) for r in records], rounds=3)
+
+
+@pytest.mark.benchmark(group="insert 1000 records")
+def bench_insert_bulk(benchmark, scratch_db):
+    records = _new_records(BULK_COUNT)
+    benchmark.pedantic(bulk_create_weather_records, args=(records,), rounds=10)
+
+
+@pytest.mark.benchmark(group="update 1000 records")
+def bench_update_per_row(benchmark, scratch_db):
+    def update_each(ids):
+        for record_id in ids:
+            update_weather_record(record_id, description="clear sky")
+
+    benchmark.pedantic(update_each, setup=lambda: ((_inserted_ids(BULK_COUNT),), {}), rounds=3)
+
+
+@pytest.mark.benchmark(group="update 1000 records")
+def bench_update_bulk(benchmark, scratch_db):
+    benchmark.pedantic(
+        lambda ids: bulk_update_weather_records({"description": "clear sky"}, record_ids=ids),
+        setup=lambda: ((_inserted_ids(BULK_COUNT),), {}),
+        rounds=10,
+    )
+
+
+@pytest.mark.benchmark(group="delete 1000 records")
+def bench_delete_per_row(benchmark, scratch_db):
+    def delete_each(ids):
+        for record_id in ids:
+            delete_weather_record(record_id)
+
+    benchmark.pedantic(delete_each, setup=lambda: ((_inserted_ids(BULK_COUNT),), {}), rounds=3)
+
+
+@pytest.mark.benchmark(group="delete 1000 records")
+def bench_delete_bulk(benchmark, scratch_db):
+    benchmark.pedantic(
+        lambda ids: bulk_delete_weather_records(record_ids=ids),
+        setup=lambda: ((_inserted_ids(BULK_COUNT),), {}),
+        rounds=10,
+    )
+
+
+@pytest.mark.benchmark(group="export")
+@pytest.mark.parametrize("export_format", list(EXPORT_FORMATS))
+def bench_export_records(measure, export_format):
+    #the streamed export, chunks are consumed and dropped like a response body would be
+    measure(lambda: sum(len(chunk) for chunk in export_records(export_format)))
@@ -0,0 +1,30 @@
+import json
+
+import pytest
+
+from benchmarks.payloads import current_weather_payload, forecast_payload
+from weather_app.backend.services.api import parse_current_weather, parse_forecast, parse_locations
+
+GEO_RESULTS = json.dumps([
+    {"name": "London", "lat": 51.5073, "lon": -0.1276, "country": "GB", "state": "England"},
+    {"name": "London", "lat": 42.9834, "lon": -81.233, "country": "CA", "state": "Ontario"},
+    {"name": "London", "lat": 39.8865, "lon": -83.4483, "country": "US", "state": "Ohio"},
+]).encode()
+
+
+@pytest.mark.benchmark(group="parse current weather")
+def bench_parse_current_weather(benchmark):
+    raw = json.dumps(current_weather_payload()).encode()
+    benchmark(parse_current_weather, raw)
+
+
+@pytest.mark.benchmark(group="parse forecast")
+@pytest.mark.parametrize("items", [40, 384])
+def bench_parse_forecast(benchmark, items):
+    raw = json.dumps(forecast_payload(items)).encode()
+    benchmark(parse_forecast, raw)
+
+
+@pytest.mark.benchmark(group="parse locations")
+def bench_parse_locations(benchmark):
+    benchmark(parse_locations, GEO_RESULTS)
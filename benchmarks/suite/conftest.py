@@ -0,0 +1,91 @@
+import os
+import sqlite3
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+from sqlmodel import Session, SQLModel
+
+#sets the dummy API key before the settings load
+import benchmarks.payloads
+from weather_app.backend.models.models import WeatherRecord
+from weather_app.backend.services import database
+from weather_app.backend.services.database import create_db_engine
+
+ROW_COUNTS = [int(n) for n in os.environ.get("BENCH_ROWS", "10000,100000,1000000").split(",")]
+#rows are inserted in batches so seeding 1M rows doesn't hold them all in one statement
+SEED_BATCH = 50_000
+
+
+def seed_rows(count: int, start: int = 0) -> list[dict]:
+    today = date.today()
+    created = datetime(2025, 1, 1)
+    return [
+        {
+            "location_name": f"City {i % 5000}, GB",
+            "latitude": -60 + (i * 7) % 120 + 0.25,
+            "longitude": -170 + (i * 13) % 340 + 0.5,
+            "date_from": today,
+            "date_to": today + timedelta(days=i % 5),
+            "temperature_kelvin": 260 + (i % 400) / 10,
+            "temperature_feels_like": 258 + (i % 400) / 10,
+            "humidity": i % 100,
+            "description": "broken clouds",
+            "icon_code": "04d",
+            "wind_speed": (i % 150) / 10,
+            "created_at": created + timedelta(seconds=i),
+        }
+        for i in range(start, start + count)
+    ]
+
+
+@pytest.fixture(scope="session", params=ROW_COUNTS, ids=lambda n: f"{n}rows")
+def seeded_engine(request, tmp_path_factory):
+    #one sqlite file per size, shared by every benchmark of that size
+    rows = request.param
+    path = tmp_path_factory.mktemp("db") / f"weather_{rows}.db"
+    engine = create_db_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        for start in range(0, rows, SEED_BATCH):
+            session.execute(insert(WeatherRecord), seed_rows(min(SEED_BATCH, rows - start), start))
+        session.commit()
+    engine.rows = rows
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def records_db(seeded_engine, monkeypatch):
+    #the database functions read the module level engine, point it at the seeded file
+    monkeypatch.setattr(database, "engine", seeded_engine)
+    return seeded_engine
+
+
+@pytest.fixture
+def scratch_db(seeded_engine, tmp_path, monkeypatch):
+    #write benchmarks get their own copy of the seeded file, so the shared one keeps its size
+    #and every read benchmark measures the table it is labelled with
+    copy = tmp_path / "weather.db"
+    source, target = sqlite3.connect(seeded_engine.url.database), sqlite3.connect(copy)
+    source.backup(target)
+    source.close()
+    target.close()
+
+    engine = create_db_engine(f"sqlite:///{copy}")
+    engine.rows = seeded_engine.rows
+    monkeypatch.setattr(database, "engine", engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def measure(benchmark, records_db):
+    #calls over the big tables take seconds, so they get fewer rounds than the microbenchmarks
+    def run(fn):
+        if records_db.rows >= 1_000_000:
+            return benchmark.pedantic(fn, rounds=2, iterations=1, warmup_rounds=0)
+        if records_db.rows >= 100_000:
+            return benchmark.pedantic(fn, rounds=5, iterations=1, warmup_rounds=1)
+        return benchmark(fn)
+    return run
@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -8,7 +9,48 @@ class Settings(BaseSettings):
     )
     open_weather_map_api_key: str
     database_url: str = "sqlite:///weather_app.db"  
+    history_page_size: int = 50
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_recycle: int = 1800
+    sqlite_busy_timeout: float = 5.0
+    sqlite_mmap_size: int = 268435456
     weather_api_base_url: str = "https://api.openweathermap.org/data/2.5"
+    geocoding_api_url: str = "https://api.openweathermap.org/geo/1.0/direct"
     weather_api_timeout: float = 10.0
+    http_connect_timeout: float = 5.0
+    http_read_timeout: Optional[float] = None
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30.0
+    http2: bool = False
+    retry_max_attempts: int = 3
+    retry_base_delay: float = 0.2
+    retry_max_delay: float = 2.0
+    retry_budget_ratio: float = 0.2
+    breaker_failure_threshold: int = 5
+    breaker_reset_timeout: float = 30.0
+    rate_limit_enabled: bool = True
+    rate_limit_per_minute: float = 60.0
+    rate_limit_burst: int = 20
+    weather_cache_ttl: float = 600.0
+    weather_cache_max_size: int = 1024
+    weather_cache_coord_precision: int = 2
+    forecast_cache_max_size: int = 512
+    forecast_issuance_interval: int = 10800
+    gazetteer_enabled: bool = True
+    gazetteer_path: Optional[str] = None
+    gazetteer_admin1_path: Optional[str] = None
+    reverse_geocode_max_distance_km: float = 30.0
+    weather_batch_concurrency: int = 10
+    geocode_cache_ttl: float = 604800.0
+    geocode_cache_max_size: int = 4096
+    geocode_cache_path: Optional[str] = None
+    autocomplete_debounce: float = 0.25
+    autocomplete_limit: int = 5
+    response_cache_path: Optional[str] = None
+    response_cache_max_size: int = 10000
+    response_cache_min_ttl: float = 60.0
+    response_cache_timeout: float = 1.0
 
 settings = Settings()
\ No newline at end of file
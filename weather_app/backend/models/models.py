@@ -1,10 +1,17 @@
 from datetime import datetime, date
 from typing import Optional
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field
 
 class WeatherRecord(SQLModel, table=True):
+    #(created_at, id) serves the newest first history pages, (latitude, longitude) lookups by place
+    __table_args__ = (
+        Index("ix_weatherrecord_created_at_id", "created_at", "id"),
+        Index("ix_weatherrecord_latitude_longitude", "latitude", "longitude"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)                 
-    location_name: str                    
+    location_name: str = Field(index=True)
     latitude: float
     longitude: float
     date_from: date
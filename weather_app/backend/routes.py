@@ -0,0 +1,29 @@
+from datetime import date
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from weather_app.backend.services.export import EXPORT_FORMATS, export_records
+
+
+def export_history(request: Request) -> Response:
+    #sent in chunks as the rows are read, starlette iterates the generator in a worker thread
+    #so the database reads don't block the event loop
+    export_format = EXPORT_FORMATS.get(request.path_params["format"])
+    if export_format is None:
+        return PlainTextResponse("Unknown export format", status_code=404)
+    
+    filename = f"weather_history_{date.today().isoformat()}.{export_format.extension}"
+    return StreamingResponse(
+        export_records(export_format.name),
+        media_type=export_format.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+#mounted in front of the Reflex backend through rx.App(api_transformer=...)
+api = Starlette(routes=[
+    Route("/export/{format}", export_history),
+])
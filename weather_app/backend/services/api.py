@@ -1,10 +1,33 @@
-from dataclasses import dataclass
-from datetime import datetime
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
 from typing import Optional
 import httpx
 from weather_app.backend.core.config import settings
+from weather_app.backend.services.cache import (
+    TTLCache,
+    snap_coords,
+    seconds_until_next_issuance,
+)
+from weather_app.backend.services.columnar import ColumnarForecast
+from weather_app.backend.services.gazetteer import (
+    Gazetteer,
+    GazetteerEntry,
+    distance_km,
+    load_gazetteer,
+    normalize_name,
+)
+from weather_app.backend.services.geocode_cache import GeocodeCache
+from weather_app.backend.services.http import get_client, get_async_client
+from weather_app.backend.services.parsing import Field, compile_parser, loads
+from weather_app.backend.services.resilience import CircuitBreaker, RetryPolicy
+from weather_app.backend.services.ratelimit import Priority, RateLimitExceeded, TokenBucket
+from weather_app.backend.services.response_cache import ResponseCache, response_expiry
+from weather_app.backend.services.singleflight import SingleFlight, AsyncSingleFlight
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Location:
     #This is the location for the dropdown selector
     name: str           
@@ -21,15 +44,16 @@ class Location:
         return f"{self.name}, {self.country}"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class WeatherCondition:
+    #Interned by id + icon when parsed, every forecast item with the same condition shares one
     id: int
     main: str           
     description: str    
     icon: str          
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class CurrentWeather:
     location_name: str
     country: str
@@ -63,7 +87,7 @@ class CurrentWeather:
         return round(self.feels_like_kelvin - 273.15, 1)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ForecastItem:
     timestamp: datetime
     temperature_kelvin: float
@@ -98,259 +122,946 @@ class Forecast:
     latitude: float
     longitude: float
     items: list[ForecastItem]
+    timezone_offset: int = 0  # seconds east of UTC, from the city in the payload
+    _daily_summary: Optional[list[dict]] = field(default=None, init=False, repr=False, compare=False)
 
     def get_daily_summary(self) -> list[dict]:
-        daily: dict[str, list[ForecastItem]] = {}
-        
-        for item in self.items:
-            day_key = item.timestamp.strftime("%Y-%m-%d")
-            if day_key not in daily:
-                daily[day_key] = []
-            daily[day_key].append(item)
-        
-        summaries = []
-        for date_str, items in daily.items():
-            temps = [i.temperature_celsius for i in items]
-            noon_item = min(items, key=lambda x: abs(x.timestamp.hour - 12))
-            
-            temp_min_c = min(temps)
-            temp_max_c = max(temps)
-            summaries.append({
-                "date": date_str,
-                "date_short": date_str[5:],
-                "temp_min_c": temp_min_c,
-                "temp_max_c": temp_max_c,
-                "temp_min_f": round(temp_min_c * 9/5 + 32, 1),
-                "temp_max_f": round(temp_max_c * 9/5 + 32, 1),
-                "condition": noon_item.condition.main,
-                "description": noon_item.condition.description,
-                "icon": noon_item.condition.icon,
-                "icon_url": noon_item.icon_url,
-                "humidity_avg": round(sum(i.humidity for i in items) / len(items)),
-                "precipitation_prob": max(i.precipitation_probability for i in items),
-            })
-        
-        return summaries
+        #Days are bucketed in the city's own timezone, not the server's, so the same forecast gives
+        #the same summary on every host. It's computed once and kept on the forecast
+        if self._daily_summary is None:
+            self._daily_summary = ColumnarForecast.from_forecast(self).get_daily_summary()
+        return self._daily_summary
+
+#Response field tables: every endpoint variant (by name, by coords, sync, async) goes through
+#the same compiled parser, so the mapping can't drift between them
+
+_build_condition = compile_parser(WeatherCondition, (
+    Field("id", ("id",)),
+    Field("main", ("main",)),
+    Field("description", ("description",)),
+    Field("icon", ("icon",)),
+))
+
+#OpenWeatherMap has ~50 condition ids with a day and night icon, so this stays small
+_conditions: dict[tuple[int, str], WeatherCondition] = {}
+
+
+def _parse_condition(data: dict) -> WeatherCondition:
+    condition = _conditions.get((data["id"], data["icon"]))
+    if condition is None:
+        condition = _conditions.setdefault((data["id"], data["icon"]), _build_condition(data))
+    return condition
+
+
+parse_current_weather = compile_parser(CurrentWeather, (
+    Field("location_name", ("name",)),
+    Field("country", ("sys", "country")),
+    Field("latitude", ("coord", "lat")),
+    Field("longitude", ("coord", "lon")),
+    Field("temperature_kelvin", ("main", "temp")),
+    Field("feels_like_kelvin", ("main", "feels_like")),
+    Field("temp_min_kelvin", ("main", "temp_min")),
+    Field("temp_max_kelvin", ("main", "temp_max")),
+    Field("humidity", ("main", "humidity")),
+    Field("pressure", ("main", "pressure")),
+    Field("visibility", ("visibility",), default=0),
+    Field("wind_speed", ("wind", "speed")),
+    Field("wind_deg", ("wind", "deg"), default=0),
+    Field("clouds", ("clouds", "all")),
+    Field("condition", ("weather", 0), convert=_parse_condition),
+    Field("sunrise", ("sys", "sunrise"), convert=datetime.fromtimestamp),
+    Field("sunset", ("sys", "sunset"), convert=datetime.fromtimestamp),
+    Field("timestamp", ("dt",), convert=datetime.fromtimestamp),
+), accepts_raw=True)
+
+def _utc_datetime(timestamp: int) -> datetime:
+    return datetime.fromtimestamp(timestamp, timezone.utc)
+
+
+_parse_forecast_item = compile_parser(ForecastItem, (
+    Field("timestamp", ("dt",), convert=_utc_datetime),
+    Field("temperature_kelvin", ("main", "temp")),
+    Field("feels_like_kelvin", ("main", "feels_like")),
+    Field("temp_min_kelvin", ("main", "temp_min")),
+    Field("temp_max_kelvin", ("main", "temp_max")),
+    Field("humidity", ("main", "humidity")),
+    Field("pressure", ("main", "pressure")),
+    Field("wind_speed", ("wind", "speed")),
+    Field("wind_deg", ("wind", "deg"), default=0),
+    Field("clouds", ("clouds", "all")),
+    Field("condition", ("weather", 0), convert=_parse_condition),
+    Field("precipitation_probability", ("pop",), default=0.0),
+))
+
+
+def _parse_forecast_items(items: list[dict]) -> list[ForecastItem]:
+    return [_parse_forecast_item(item) for item in items]
+
+
+parse_forecast = compile_parser(Forecast, (
+    Field("location_name", ("city", "name")),
+    Field("country", ("city", "country")),
+    Field("latitude", ("city", "coord", "lat")),
+    Field("longitude", ("city", "coord", "lon")),
+    Field("items", ("list",), convert=_parse_forecast_items),
+    Field("timezone_offset", ("city", "timezone"), default=0),
+), accepts_raw=True)
+
+_parse_location = compile_parser(Location, (
+    Field("name", ("name",)),
+    Field("country", ("country",)),
+    Field("state", ("state",), default=None),
+    Field("latitude", ("lat",)),
+    Field("longitude", ("lon",)),
+))
+
+
+def parse_locations(data: bytes | str | list) -> list[Location]:
+    if isinstance(data, (bytes, bytearray, str)):
+        data = loads(data)
+    return [_parse_location(item) for item in data]
+
+
+@dataclass
+class WeatherResult:
+    #One item of a batch lookup: either weather or the error for that location
+    latitude: float
+    longitude: float
+    weather: Optional[CurrentWeather] = None
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
 
 class WeatherAPIError(Exception):
     pass
 
-class WeatherService:
+
+class UpstreamUnavailableError(WeatherAPIError):
+    #OpenWeatherMap is failing or the circuit breaker is open, cached data may still be served
+    pass
+
+class _BaseWeatherService:
 
     BASE_URL = settings.weather_api_base_url
-    TIMEOUT = settings.weather_api_timeout
-    
-    def __init__(self, api_key: Optional[str] = None):
+    GEO_URL = settings.geocoding_api_url
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        current_cache: Optional[TTLCache] = None,
+        forecast_cache: Optional[TTLCache] = None,
+        gazetteer: Optional[Gazetteer] = None,
+        geocode_cache: Optional[GeocodeCache] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        response_cache: Optional[ResponseCache] = None,
+    ):
         self.api_key = api_key or settings.open_weather_map_api_key
-        self._client = httpx.Client(timeout=self.TIMEOUT)
-    
+        if current_cache is None:
+            current_cache = TTLCache(
+                ttl=settings.weather_cache_ttl,
+                max_size=settings.weather_cache_max_size,
+            )
+        self.current_cache = current_cache
+        if forecast_cache is None:
+            forecast_cache = TTLCache(
+                ttl=settings.forecast_issuance_interval,
+                max_size=settings.forecast_cache_max_size,
+            )
+        self.forecast_cache = forecast_cache
+        self.gazetteer = gazetteer
+        if geocode_cache is None:
+            geocode_cache = GeocodeCache(
+                ttl=settings.geocode_cache_ttl,
+                max_size=settings.geocode_cache_max_size,
+                factory=Location,
+            )
+        self.geocode_cache = geocode_cache
+        #RATE_LIMIT_ENABLED=false disables client side rate limiting
+        if rate_limiter is None and settings.rate_limit_enabled:
+            rate_limiter = TokenBucket(
+                rate_per_minute=settings.rate_limit_per_minute,
+                capacity=settings.rate_limit_burst,
+            )
+        self.rate_limiter = rate_limiter
+        if retry_policy is None:
+            retry_policy = RetryPolicy(
+                max_attempts=settings.retry_max_attempts,
+                base_delay=settings.retry_base_delay,
+                max_delay=settings.retry_max_delay,
+                budget_ratio=settings.retry_budget_ratio,
+            )
+        self.retry_policy = retry_policy
+        if breaker is None:
+            breaker = CircuitBreaker(
+                failure_threshold=settings.breaker_failure_threshold,
+                reset_timeout=settings.breaker_reset_timeout,
+            )
+        self.breaker = breaker
+        #None keeps responses in this process only
+        self.response_cache = response_cache
+
+    def _location_key(self, endpoint: str, location: str) -> tuple:
+        return (endpoint, location.strip().lower())
+
+    def _coords_key(self, endpoint: str, latitude: float, longitude: float) -> tuple:
+        return (endpoint, *snap_coords(latitude, longitude, settings.weather_cache_coord_precision))
+
+    def _cache_forecast(self, cache_key: tuple, forecast: Forecast, ttl: float) -> Forecast:
+        #the summary is memoized on the forecast, so repeat views skip the aggregation too
+        forecast.get_daily_summary()
+        self.forecast_cache.set(cache_key, forecast, ttl=ttl)
+        return forecast
+
+    def _read_response(self, cache_key: tuple) -> Optional[tuple[dict, float]]:
+        #(data, seconds it stays fresh) from the shared response cache
+        if self.response_cache is None:
+            return None
+        
+        stored = self.response_cache.get(cache_key)
+        if stored is None:
+            return None
+        body, expires_at = stored
+        return loads(body), expires_at - time.time()
+
+    def _store_response(self, cache_key: tuple, response: httpx.Response, data: dict) -> float:
+        #returns how long the response stays fresh and shares it with the other workers
+        if cache_key[0] == "forecast":
+            ttl = seconds_until_next_issuance(settings.forecast_issuance_interval)
+        else:
+            ttl = settings.weather_cache_ttl
+        expires_at = response_expiry(response.headers, data, ttl, settings.response_cache_min_ttl)
+        
+        fresh_for = expires_at - time.time()
+        if self.response_cache is not None and fresh_for > 0:
+            self.response_cache.set(cache_key, response.content, expires_at)
+        return fresh_for
+
+    def _rate_limited(self, error: RateLimitExceeded, attempt: int) -> None:
+        if not attempt:
+            raise WeatherAPIError(f"{error}, please try again in a moment")
+        #a retry without a token ends like a retry that ran out of attempts: the upstream is
+        #failing, and the stale copy is served instead of an error
+        self.breaker.record_failure()
+        raise UpstreamUnavailableError(f"{error} while retrying: weather service unavailable")
+
+    def _is_transient(self, response: Optional[httpx.Response]) -> bool:
+        #network errors, 429 and 5xx are worth retrying, other statuses are real answers
+        return response is None or response.status_code == 429 or response.status_code >= 500
+
+    def _serve_stale(self, cache: TTLCache, cache_key: tuple, error: UpstreamUnavailableError):
+        stale = cache.get_stale(cache_key)
+        if stale is not None:
+            return stale
+        
+        #a process that started during the outage can still have what another worker stored
+        stored = (
+            self.response_cache.get(cache_key, allow_stale=True)
+            if self.response_cache is not None
+            else None
+        )
+        if stored is None:
+            raise error
+        parse = parse_forecast if cache_key[0] == "forecast" else parse_current_weather
+        return parse(stored[0])
+
+    def resilience_stats(self) -> dict:
+        return {
+            "breaker": self.breaker.stats(),
+            "retries": self.retry_policy.stats(),
+        }
+
+    def rate_limit_stats(self) -> dict:
+        return self.rate_limiter.stats() if self.rate_limiter is not None else {}
+
+    def cache_stats(self) -> dict:
+        return {
+            "current_weather": self.current_cache.stats(),
+            "forecast": self.forecast_cache.stats(),
+            "geocoding": self.geocode_cache.stats(),
+            "responses": self.response_cache.stats() if self.response_cache is not None else {},
+        }
+
     def _handle_response(self, response: httpx.Response) -> dict:
         if response.status_code == 200:
-            return response.json()
+            return loads(response.content)
         
         try:
-            error_data = response.json()
+            error_data = loads(response.content)
             message = error_data.get("message", "Unknown error")
         except Exception:
             message = response.text or "Unknown error"
         
-        else:
-            raise WeatherAPIError(f"Error {response.status_code}: {message}")
+        raise WeatherAPIError(f"Error {response.status_code}: {message}")
     
-    def _parse_condition(self, weather_data: dict) -> WeatherCondition:
-        return WeatherCondition(
-            id=weather_data["id"],
-            main=weather_data["main"],
-            description=weather_data["description"],
-            icon=weather_data["icon"],
+    def _unique_coords(self, coords: list[tuple[float, float]]) -> dict[tuple, tuple[float, float]]:
+        #coordinates that share a cache entry only need to be fetched once
+        unique = {}
+        for latitude, longitude in coords:
+            unique.setdefault(self._coords_key("weather", latitude, longitude), (latitude, longitude))
+        return unique
+
+    def _entry_to_location(self, entry: GazetteerEntry) -> Location:
+        return Location(
+            name=entry.name,
+            country=entry.country,
+            state=entry.state,
+            latitude=entry.latitude,
+            longitude=entry.longitude,
         )
+
+    def _search_local(self, query: str, limit: int) -> list[Location]:
+        if self.gazetteer is None:
+            return []
+        
+        return [self._entry_to_location(entry) for entry in self.gazetteer.search(query, limit)]
+
+    def _merge_locations(self, local: list[Location], remote: list[Location], limit: int) -> list[Location]:
+        #local prefix matches first, then the API's places that aren't one of them already
+        #(Paris, Texas next to the bundled Paris, France)
+        merged = list(local)
+        for location in remote:
+            duplicate = any(
+                known.country == location.country
+                and normalize_name(known.name) == normalize_name(location.name)
+                and distance_km(known.latitude, known.longitude, location.latitude, location.longitude)
+                <= settings.reverse_geocode_max_distance_km
+                for known in local
+            )
+            if not duplicate:
+                merged.append(location)
+        return merged[:limit]
+
+    def reverse_geocode(self, latitude: float, longitude: float) -> Optional[Location]:
+        #Nearest bundled place to the coordinates, offline, None when nothing is close enough.
+        #It's a local lookup, so the sync and async services share it
+        if self.gazetteer is None:
+            return None
+
+        entry = self.gazetteer.nearest(latitude, longitude, settings.reverse_geocode_max_distance_km)
+        return self._entry_to_location(entry) if entry is not None else None
+
+
+class WeatherService(_BaseWeatherService):
     
-    def get_current_weather(self, location: str) -> CurrentWeather:
-        response = self._client.get(
-            f"{self.BASE_URL}/weather",
-            params={
-                "q": location,
-                "appid": self.api_key,
-            }
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        current_cache: Optional[TTLCache] = None,
+        forecast_cache: Optional[TTLCache] = None,
+        gazetteer: Optional[Gazetteer] = None,
+        geocode_cache: Optional[GeocodeCache] = None,
+        client: Optional[httpx.Client] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        response_cache: Optional[ResponseCache] = None,
+    ):
+        super().__init__(
+            api_key,
+            current_cache,
+            forecast_cache,
+            gazetteer,
+            geocode_cache,
+            rate_limiter,
+            retry_policy,
+            breaker,
+            response_cache,
         )
+        #without an explicit client we use the process wide pooled one, which we don't close
+        self._owns_client = client is not None
+        self._client = client or get_client()
+        self._inflight = SingleFlight()
+
+    def _acquire(self, priority: Priority, max_wait: Optional[float] = None) -> None:
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(priority, max_wait)
+
+    def _request(self, url: str, params: dict, priority: Priority) -> httpx.Response:
+        #fail fast while the upstream is unhealthy instead of piling up blocked requests
+        if not self.breaker.allow():
+            raise UpstreamUnavailableError("Weather service is temporarily unavailable")
+        
+        self.retry_policy.record_request()
+        attempt = 0
+        while True:
+            try:
+                #a retry waits no longer for a token than for its backoff
+                self._acquire(priority, self.retry_policy.max_delay if attempt else None)
+            except RateLimitExceeded as e:
+                self._rate_limited(e, attempt)
+            
+            try:
+                response = self._client.get(url, params={**params, "appid": self.api_key})
+                error = None
+            except httpx.TransportError as e:
+                response, error = None, e
+            
+            if not self._is_transient(response):
+                self.breaker.record_success()
+                return response
+            
+            delay = self.retry_policy.next_delay(attempt)
+            if delay is None:
+                self.breaker.record_failure()
+                if response is not None:
+                    raise UpstreamUnavailableError(f"Error {response.status_code}: weather service unavailable")
+                raise UpstreamUnavailableError(f"Weather service unreachable: {error}")
+            
+            time.sleep(delay)
+            attempt += 1
+
+    def _get(
+        self,
+        endpoint: str,
+        params: dict,
+        priority: Priority,
+        cache_key: tuple,
+    ) -> tuple[dict, float]:
+        #(data, seconds it stays fresh), another worker may already have stored the response
+        stored = self._read_response(cache_key)
+        if stored is not None:
+            return stored
         
+        response = self._request(f"{self.BASE_URL}/{endpoint}", params, priority)
         data = self._handle_response(response)
+        return data, self._store_response(cache_key, response, data)
+
+    def _load_current_weather(
+        self,
+        cache_key: tuple,
+        params: dict,
+        priority: Priority,
+    ) -> CurrentWeather:
+        try:
+            data, ttl = self._get("weather", params, priority, cache_key)
+        except UpstreamUnavailableError as e:
+            return self._serve_stale(self.current_cache, cache_key, e)
+        
+        weather = parse_current_weather(data)
+        self.current_cache.set(cache_key, weather, ttl=ttl)
+        return weather
+
+    def _load_forecast(
+        self,
+        cache_key: tuple,
+        params: dict,
+        priority: Priority,
+    ) -> Forecast:
+        try:
+            data, ttl = self._get("forecast", params, priority, cache_key)
+        except UpstreamUnavailableError as e:
+            return self._serve_stale(self.forecast_cache, cache_key, e)
         
-        return CurrentWeather(
-            location_name=data["name"],
-            country=data["sys"]["country"],
-            latitude=data["coord"]["lat"],
-            longitude=data["coord"]["lon"],
-            temperature_kelvin=data["main"]["temp"],
-            feels_like_kelvin=data["main"]["feels_like"],
-            temp_min_kelvin=data["main"]["temp_min"],
-            temp_max_kelvin=data["main"]["temp_max"],
-            humidity=data["main"]["humidity"],
-            pressure=data["main"]["pressure"],
-            visibility=data.get("visibility", 0),
-            wind_speed=data["wind"]["speed"],
-            wind_deg=data["wind"].get("deg", 0),
-            clouds=data["clouds"]["all"],
-            condition=self._parse_condition(data["weather"][0]),
-            sunrise=datetime.fromtimestamp(data["sys"]["sunrise"]),
-            sunset=datetime.fromtimestamp(data["sys"]["sunset"]),
-            timestamp=datetime.fromtimestamp(data["dt"]),
+        forecast = parse_forecast(data)
+        return self._cache_forecast(cache_key, forecast, ttl)
+    
+    def get_current_weather(
+        self,
+        location: str,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> CurrentWeather:
+        cache_key = self._location_key("weather", location)
+        cached = self.current_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        #identical concurrent lookups share one request and one parsed result
+        return self._inflight.do(
+            cache_key,
+            lambda: self._load_current_weather(cache_key, {"q": location}, priority),
         )
     
     def get_current_weather_by_coords(
         self, 
         latitude: float, 
-        longitude: float
+        longitude: float,
+        priority: Priority = Priority.INTERACTIVE,
     ) -> CurrentWeather:
-        response = self._client.get(
-            f"{self.BASE_URL}/weather",
-            params={
-                "lat": latitude,
-                "lon": longitude,
-                "appid": self.api_key,
-            }
+        cache_key = self._coords_key("weather", latitude, longitude)
+        cached = self.current_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        return self._inflight.do(
+            cache_key,
+            lambda: self._load_current_weather(
+                cache_key, {"lat": latitude, "lon": longitude}, priority
+            ),
+        )
+
+    def get_forecast(
+        self,
+        location: str,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> Forecast:
+        cache_key = self._location_key("forecast", location)
+        cached = self.forecast_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        return self._inflight.do(
+            cache_key,
+            lambda: self._load_forecast(cache_key, {"q": location}, priority),
+        )
+
+    def get_daily_forecast(
+        self,
+        location: str,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> list[dict]:
+        forecast = self.get_forecast(location, priority)
+        return forecast.get_daily_summary()
+
+    def get_forecast_by_coords(
+        self, 
+        latitude: float, 
+        longitude: float,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> Forecast:
+        cache_key = self._coords_key("forecast", latitude, longitude)
+        cached = self.forecast_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        return self._inflight.do(
+            cache_key,
+            lambda: self._load_forecast(
+                cache_key, {"lat": latitude, "lon": longitude}, priority
+            ),
         )
+
+    def get_daily_forecast_by_coords(
+        self, 
+        latitude: float, 
+        longitude: float,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> list[dict]:
+        forecast = self.get_forecast_by_coords(latitude, longitude, priority)
+        return forecast.get_daily_summary()
+    
+    def get_current_weather_many(
+        self,
+        coords: list[tuple[float, float]],
+        priority: Priority = Priority.BACKGROUND,
+    ) -> list[WeatherResult]:
+        unique = self._unique_coords(coords)
+
+        def fetch(latlon: tuple[float, float]) -> tuple[Optional[CurrentWeather], Optional[Exception]]:
+            try:
+                return self.get_current_weather_by_coords(*latlon, priority), None
+            except Exception as e:
+                return None, e
+
+        workers = max(1, min(settings.weather_batch_concurrency, len(unique)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            fetched = dict(zip(unique, pool.map(fetch, unique.values())))
+
+        results = []
+        for latitude, longitude in coords:
+            weather, error = fetched[self._coords_key("weather", latitude, longitude)]
+            results.append(WeatherResult(latitude, longitude, weather, error))
+        return results
+    
+    def search_locations(
+        self,
+        query: str,
+        limit: int = 5,
+        priority: Priority = Priority.AUTOCOMPLETE,
+    ) -> list[Location]:
+        if not query or len(query) < 2:
+            return []
+
+        #a full page of bundled matches is the answer. Fewer can mean the place isn't bundled,
+        #or shares its name with one that is, so the geocoding API is asked too
+        local = self._search_local(query, limit)
+        if len(local) >= limit:
+            return local
+        return self._merge_locations(local, self._search_remote(query, limit, priority), limit)
+
+    def _search_remote(self, query: str, limit: int, priority: Priority) -> list[Location]:
+        remote_limit = min(limit, 5)
+        cached = self.geocode_cache.get(query, remote_limit)
+        if cached is not None:
+            return cached
+
+        try:
+            response = self._request(
+                self.GEO_URL,
+                {"q": query, "limit": remote_limit},
+                priority,
+            )
+        except WeatherAPIError:
+            return []
         
-        data = self._handle_response(response)
+        if response.status_code != 200:
+            return []
         
-        return CurrentWeather(
-            location_name=data["name"],
-            country=data["sys"]["country"],
-            latitude=data["coord"]["lat"],
-            longitude=data["coord"]["lon"],
-            temperature_kelvin=data["main"]["temp"],
-            feels_like_kelvin=data["main"]["feels_like"],
-            temp_min_kelvin=data["main"]["temp_min"],
-            temp_max_kelvin=data["main"]["temp_max"],
-            humidity=data["main"]["humidity"],
-            pressure=data["main"]["pressure"],
-            visibility=data.get("visibility", 0),
-            wind_speed=data["wind"]["speed"],
-            wind_deg=data["wind"].get("deg", 0),
-            clouds=data["clouds"]["all"],
-            condition=self._parse_condition(data["weather"][0]),
-            sunrise=datetime.fromtimestamp(data["sys"]["sunrise"]),
-            sunset=datetime.fromtimestamp(data["sys"]["sunset"]),
-            timestamp=datetime.fromtimestamp(data["dt"]),
-        )
+        locations = parse_locations(response.content)
+        self.geocode_cache.set(query, locations, remote_limit)
+        return locations
+
+    def close(self):
+        if self._owns_client:
+            self._client.close()
+    
+    def __enter__(self):
+        return self
     
-    def get_forecast(self, location: str) -> Forecast:
-        response = self._client.get(
-            f"{self.BASE_URL}/forecast",
-            params={
-                "q": location,
-                "appid": self.api_key,
-            }
+    def __exit__(self, *args):
+        self.close()
+
+
+class AsyncWeatherService(_BaseWeatherService):
+    #Same API as WeatherService but non-blocking, so several calls can run concurrently
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        current_cache: Optional[TTLCache] = None,
+        forecast_cache: Optional[TTLCache] = None,
+        gazetteer: Optional[Gazetteer] = None,
+        geocode_cache: Optional[GeocodeCache] = None,
+        client: Optional[httpx.AsyncClient] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        response_cache: Optional[ResponseCache] = None,
+    ):
+        super().__init__(
+            api_key,
+            current_cache,
+            forecast_cache,
+            gazetteer,
+            geocode_cache,
+            rate_limiter,
+            retry_policy,
+            breaker,
+            response_cache,
         )
+        #without an explicit client we use the pooled one of the running loop, which we don't close
+        self._owns_client = client is not None
+        self._explicit_client = client
+        self._inflight = AsyncSingleFlight()
+
+    @property
+    def _client(self) -> httpx.AsyncClient:
+        #looked up on every request: the service is built at import time, outside any loop
+        return self._explicit_client or get_async_client()
+
+    async def _acquire(self, priority: Priority, max_wait: Optional[float] = None) -> None:
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire_async(priority, max_wait)
+
+    async def _request(self, url: str, params: dict, priority: Priority) -> httpx.Response:
+        #fail fast while the upstream is unhealthy instead of piling up blocked requests
+        if not self.breaker.allow():
+            raise UpstreamUnavailableError("Weather service is temporarily unavailable")
         
+        self.retry_policy.record_request()
+        attempt = 0
+        while True:
+            try:
+                #a retry waits no longer for a token than for its backoff
+                await self._acquire(priority, self.retry_policy.max_delay if attempt else None)
+            except RateLimitExceeded as e:
+                self._rate_limited(e, attempt)
+            
+            try:
+                response = await self._client.get(url, params={**params, "appid": self.api_key})
+                error = None
+            except httpx.TransportError as e:
+                response, error = None, e
+            
+            if not self._is_transient(response):
+                self.breaker.record_success()
+                return response
+            
+            delay = self.retry_policy.next_delay(attempt)
+            if delay is None:
+                self.breaker.record_failure()
+                if response is not None:
+                    raise UpstreamUnavailableError(f"Error {response.status_code}: weather service unavailable")
+                raise UpstreamUnavailableError(f"Weather service unreachable: {error}")
+            
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _off_loop(self, fn, *args):
+        #the shared response cache is a sqlite file whose queries can wait on another worker's
+        #lock, so they run in a thread instead of stalling every other request on the loop
+        if self.response_cache is None:
+            return fn(*args)
+        return await asyncio.to_thread(fn, *args)
+
+    async def _get(
+        self,
+        endpoint: str,
+        params: dict,
+        priority: Priority,
+        cache_key: tuple,
+    ) -> tuple[dict, float]:
+        #(data, seconds it stays fresh), another worker may already have stored the response
+        stored = await self._off_loop(self._read_response, cache_key)
+        if stored is not None:
+            return stored
+        
+        response = await self._request(f"{self.BASE_URL}/{endpoint}", params, priority)
         data = self._handle_response(response)
+        return data, await self._off_loop(self._store_response, cache_key, response, data)
+
+    async def _load_current_weather(
+        self,
+        cache_key: tuple,
+        params: dict,
+        priority: Priority,
+    ) -> CurrentWeather:
+        try:
+            data, ttl = await self._get("weather", params, priority, cache_key)
+        except UpstreamUnavailableError as e:
+            return await self._off_loop(self._serve_stale, self.current_cache, cache_key, e)
         
-        items = []
-        for item_data in data["list"]:
-            items.append(ForecastItem(
-                timestamp=datetime.fromtimestamp(item_data["dt"]),
-                temperature_kelvin=item_data["main"]["temp"],
-                feels_like_kelvin=item_data["main"]["feels_like"],
-                temp_min_kelvin=item_data["main"]["temp_min"],
-                temp_max_kelvin=item_data["main"]["temp_max"],
-                humidity=item_data["main"]["humidity"],
-                pressure=item_data["main"]["pressure"],
-                wind_speed=item_data["wind"]["speed"],
-                wind_deg=item_data["wind"].get("deg", 0),
-                clouds=item_data["clouds"]["all"],
-                condition=self._parse_condition(item_data["weather"][0]),
-                precipitation_probability=item_data.get("pop", 0.0),
-            ))
+        weather = parse_current_weather(data)
+        self.current_cache.set(cache_key, weather, ttl=ttl)
+        return weather
+
+    async def _load_forecast(
+        self,
+        cache_key: tuple,
+        params: dict,
+        priority: Priority,
+    ) -> Forecast:
+        try:
+            data, ttl = await self._get("forecast", params, priority, cache_key)
+        except UpstreamUnavailableError as e:
+            return await self._off_loop(self._serve_stale, self.forecast_cache, cache_key, e)
         
-        return Forecast(
-            location_name=data["city"]["name"],
-            country=data["city"]["country"],
-            latitude=data["city"]["coord"]["lat"],
-            longitude=data["city"]["coord"]["lon"],
-            items=items,
+        forecast = parse_forecast(data)
+        return self._cache_forecast(cache_key, forecast, ttl)
+    
+    async def get_current_weather(
+        self,
+        location: str,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> CurrentWeather:
+        cache_key = self._location_key("weather", location)
+        cached = self.current_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        #identical concurrent lookups share one request and one parsed result
+        return await self._inflight.do(
+            cache_key,
+            lambda: self._load_current_weather(cache_key, {"q": location}, priority),
         )
     
-    def get_forecast_by_coords(
+    async def get_current_weather_by_coords(
         self, 
         latitude: float, 
-        longitude: float
+        longitude: float,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> CurrentWeather:
+        cache_key = self._coords_key("weather", latitude, longitude)
+        cached = self.current_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        return await self._inflight.do(
+            cache_key,
+            lambda: self._load_current_weather(
+                cache_key, {"lat": latitude, "lon": longitude}, priority
+            ),
+        )
+
+    async def get_forecast(
+        self,
+        location: str,
+        priority: Priority = Priority.INTERACTIVE,
     ) -> Forecast:
+        cache_key = self._location_key("forecast", location)
+        cached = self.forecast_cache.get(cache_key)
+        if cached is not None:
+            return cached
 
-        response = self._client.get(
-            f"{self.BASE_URL}/forecast",
-            params={
-                "lat": latitude,
-                "lon": longitude,
-                "appid": self.api_key,
-            }
+        return await self._inflight.do(
+            cache_key,
+            lambda: self._load_forecast(cache_key, {"q": location}, priority),
         )
-        
-        data = self._handle_response(response)
-        
-        items = []
-        for item_data in data["list"]:
-            items.append(ForecastItem(
-                timestamp=datetime.fromtimestamp(item_data["dt"]),
-                temperature_kelvin=item_data["main"]["temp"],
-                feels_like_kelvin=item_data["main"]["feels_like"],
-                temp_min_kelvin=item_data["main"]["temp_min"],
-                temp_max_kelvin=item_data["main"]["temp_max"],
-                humidity=item_data["main"]["humidity"],
-                pressure=item_data["main"]["pressure"],
-                wind_speed=item_data["wind"]["speed"],
-                wind_deg=item_data["wind"].get("deg", 0),
-                clouds=item_data["clouds"]["all"],
-                condition=self._parse_condition(item_data["weather"][0]),
-                precipitation_probability=item_data.get("pop", 0.0),
-            ))
-        
-        return Forecast(
-            location_name=data["city"]["name"],
-            country=data["city"]["country"],
-            latitude=data["city"]["coord"]["lat"],
-            longitude=data["city"]["coord"]["lon"],
-            items=items,
+
+    async def get_daily_forecast(
+        self,
+        location: str,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> list[dict]:
+        forecast = await self.get_forecast(location, priority)
+        return forecast.get_daily_summary()
+
+    async def get_forecast_by_coords(
+        self, 
+        latitude: float, 
+        longitude: float,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> Forecast:
+        cache_key = self._coords_key("forecast", latitude, longitude)
+        cached = self.forecast_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        return await self._inflight.do(
+            cache_key,
+            lambda: self._load_forecast(
+                cache_key, {"lat": latitude, "lon": longitude}, priority
+            ),
         )
+
+    async def get_daily_forecast_by_coords(
+        self, 
+        latitude: float, 
+        longitude: float,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> list[dict]:
+        forecast = await self.get_forecast_by_coords(latitude, longitude, priority)
+        return forecast.get_daily_summary()
     
-    def search_locations(self, query: str, limit: int = 5) -> list[Location]:
+    async def get_current_weather_many(
+        self,
+        coords: list[tuple[float, float]],
+        priority: Priority = Priority.BACKGROUND,
+    ) -> list[WeatherResult]:
+        unique = self._unique_coords(coords)
+        semaphore = asyncio.Semaphore(settings.weather_batch_concurrency)
+
+        async def fetch(latlon: tuple[float, float]) -> tuple[Optional[CurrentWeather], Optional[Exception]]:
+            async with semaphore:
+                try:
+                    return await self.get_current_weather_by_coords(*latlon, priority), None
+                except Exception as e:
+                    return None, e
+
+        fetched = dict(zip(
+            unique,
+            await asyncio.gather(*(fetch(latlon) for latlon in unique.values())),
+        ))
+
+        results = []
+        for latitude, longitude in coords:
+            weather, error = fetched[self._coords_key("weather", latitude, longitude)]
+            results.append(WeatherResult(latitude, longitude, weather, error))
+        return results
+
+    async def search_locations(
+        self,
+        query: str,
+        limit: int = 5,
+        priority: Priority = Priority.AUTOCOMPLETE,
+    ) -> list[Location]:
         if not query or len(query) < 2:
             return []
-        
-        response = self._client.get(
-            "https://api.openweathermap.org/geo/1.0/direct",
-            params={
-                "q": query,
-                "limit": min(limit, 5),
-                "appid": self.api_key,
-            }
-        )
+
+        #a full page of bundled matches is the answer. Fewer can mean the place isn't bundled,
+        #or shares its name with one that is, so the geocoding API is asked too
+        local = self._search_local(query, limit)
+        if len(local) >= limit:
+            return local
+        return self._merge_locations(local, await self._search_remote(query, limit, priority), limit)
+
+    async def _search_remote(self, query: str, limit: int, priority: Priority) -> list[Location]:
+        remote_limit = min(limit, 5)
+        cached = self.geocode_cache.get(query, remote_limit)
+        if cached is not None:
+            return cached
+
+        try:
+            response = await self._request(
+                self.GEO_URL,
+                {"q": query, "limit": remote_limit},
+                priority,
+            )
+        except WeatherAPIError:
+            return []
         
         if response.status_code != 200:
             return []
         
-        data = response.json()
-        
-        locations = []
-        for item in data:
-            locations.append(Location(
-                name=item["name"],
-                country=item["country"],
-                state=item.get("state"),
-                latitude=item["lat"],
-                longitude=item["lon"],
-            ))
-        
+        locations = parse_locations(response.content)
+        self.geocode_cache.set(query, locations, remote_limit)
         return locations
 
-    def close(self):
-        self._client.close()
-    
-    def __enter__(self):
+    async def aclose(self):
+        if self._owns_client:
+            await self._client.aclose()
+
+    async def __aenter__(self):
         return self
-    
-    def __exit__(self, *args):
-        self.close()
 
-weather_service = WeatherService()
+    async def __aexit__(self, *args):
+        await self.aclose()
+
+#both services share the caches so sync and async callers benefit from each other's lookups
+current_weather_cache = TTLCache(
+    ttl=settings.weather_cache_ttl,
+    max_size=settings.weather_cache_max_size,
+)
+forecast_cache = TTLCache(
+    ttl=settings.forecast_issuance_interval,
+    max_size=settings.forecast_cache_max_size,
+)
+gazetteer = (
+    load_gazetteer(settings.gazetteer_path, settings.gazetteer_admin1_path)
+    if settings.gazetteer_enabled
+    else None
+)
+geocode_cache = GeocodeCache(
+    ttl=settings.geocode_cache_ttl,
+    max_size=settings.geocode_cache_max_size,
+    factory=Location,
+    path=settings.geocode_cache_path,
+)
+#upstream health is shared by every service in the process
+retry_policy = RetryPolicy(
+    max_attempts=settings.retry_max_attempts,
+    base_delay=settings.retry_base_delay,
+    max_delay=settings.retry_max_delay,
+    budget_ratio=settings.retry_budget_ratio,
+)
+breaker = CircuitBreaker(
+    failure_threshold=settings.breaker_failure_threshold,
+    reset_timeout=settings.breaker_reset_timeout,
+)
+#one bucket per process, the quota belongs to the API key and not to a service instance
+rate_limiter = TokenBucket(
+    rate_per_minute=settings.rate_limit_per_minute,
+    capacity=settings.rate_limit_burst,
+) if settings.rate_limit_enabled else None
+#shared by every worker process through the file, disabled unless a path is set
+response_cache = ResponseCache(
+    path=settings.response_cache_path,
+    max_size=settings.response_cache_max_size,
+    timeout=settings.response_cache_timeout,
+) if settings.response_cache_path else None
+weather_service = WeatherService(
+    current_cache=current_weather_cache,
+    forecast_cache=forecast_cache,
+    gazetteer=gazetteer,
+    geocode_cache=geocode_cache,
+    rate_limiter=rate_limiter,
+    retry_policy=retry_policy,
+    breaker=breaker,
+    response_cache=response_cache,
+)
+async_weather_service = AsyncWeatherService(
+    current_cache=current_weather_cache,
+    forecast_cache=forecast_cache,
+    gazetteer=gazetteer,
+    geocode_cache=geocode_cache,
+    rate_limiter=rate_limiter,
+    retry_policy=retry_policy,
+    breaker=breaker,
+    response_cache=response_cache,
+)
         
 
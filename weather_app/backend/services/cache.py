@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    #In-process cache with a time to live per entry and LRU eviction once max_size is reached
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                #expired entries stay until LRU eviction so get_stale() can still serve them
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def get_stale(self, key: Hashable) -> Optional[Any]:
+        #returns the entry even if it expired, used as a fallback while the upstream is down
+        with self._lock:
+            entry = self._data.get(key)
+        return entry[1] if entry is not None else None
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        #like get() but without touching the LRU order or the hit/miss counters
+        with self._lock:
+            entry = self._data.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+
+    def items(self) -> list[tuple[Hashable, Any, float]]:
+        #(key, value, seconds left) for every live entry, oldest first
+        now = time.monotonic()
+        with self._lock:
+            return [
+                (key, value, expires_at - now)
+                for key, (expires_at, value) in self._data.items()
+                if expires_at > now
+            ]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "size": len(self._data),
+            "max_size": self.max_size,
+        }
+
+
+def snap_coords(latitude: float, longitude: float, precision: int) -> tuple[float, float]:
+    #Round coordinates so nearby lookups share the same cache entry (2 decimals is roughly 1km)
+    return round(latitude, precision), round(longitude, precision)
+
+
+def seconds_until_next_issuance(interval: int, now: Optional[float] = None) -> float:
+    #Forecasts are issued on fixed UTC boundaries (every 3h for OpenWeatherMap), so an entry
+    #stays valid until the next boundary instead of for a fixed TTL
+    now = time.time() if now is None else now
+    return interval - (now % interval)
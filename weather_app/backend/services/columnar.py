@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from weather_app.backend.services.api import Forecast, WeatherCondition
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+@dataclass
+class ColumnarForecast:
+    #Forecast stored as one array per field instead of one object per item, so daily
+    #aggregation runs as a handful of numpy reductions over every item at once
+    location_name: str
+    country: str
+    latitude: float
+    longitude: float
+    timestamp: np.ndarray           # int64 unix seconds
+    day: np.ndarray                 # int32 date ordinal of the day in the city's timezone
+    hour: np.ndarray                # int8 hour in the city's timezone
+    temperature_kelvin: np.ndarray  # float64
+    humidity: np.ndarray            # int64
+    pop: np.ndarray                 # float64 precipitation probability
+    condition_index: np.ndarray     # int32 index into conditions
+    conditions: list[WeatherCondition]
+
+    @classmethod
+    def from_forecast(cls, forecast: Forecast) -> ColumnarForecast:
+        items = forecast.items
+        conditions: list[WeatherCondition] = []
+        positions: dict[WeatherCondition, int] = {}
+        condition_index = np.empty(len(items), dtype=np.int32)
+        for i, item in enumerate(items):
+            position = positions.get(item.condition)
+            if position is None:
+                position = positions[item.condition] = len(conditions)
+                conditions.append(item.condition)
+            condition_index[i] = position
+
+        timestamp = np.fromiter((int(i.timestamp.timestamp()) for i in items), np.int64, len(items))
+        #local wall clock seconds in the city, so days and hours don't depend on the server's timezone
+        local = timestamp + forecast.timezone_offset
+
+        return cls(
+            location_name=forecast.location_name,
+            country=forecast.country,
+            latitude=forecast.latitude,
+            longitude=forecast.longitude,
+            timestamp=timestamp,
+            day=(local // 86400 + _EPOCH_ORDINAL).astype(np.int32),
+            hour=(local % 86400 // 3600).astype(np.int8),
+            temperature_kelvin=np.fromiter((i.temperature_kelvin for i in items), np.float64, len(items)),
+            humidity=np.fromiter((i.humidity for i in items), np.int64, len(items)),
+            pop=np.fromiter((i.precipitation_probability for i in items), np.float64, len(items)),
+            condition_index=condition_index,
+            conditions=conditions,
+        )
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def get_daily_summary(self) -> list[dict]:
+        #Backs Forecast.get_daily_summary
+        count = len(self)
+        if not count:
+            return []
+
+        #group items by day: stable sort so ties keep their original order, like the dict version
+        order = np.argsort(self.day, kind="stable")
+        days = self.day[order]
+        starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+        sizes = np.diff(np.r_[starts, count])
+
+        #round() is monotonic, so rounding the min/max kelvin equals the min/max of rounded celsius
+        temp_min = np.minimum.reduceat(self.temperature_kelvin[order], starts)
+        temp_max = np.maximum.reduceat(self.temperature_kelvin[order], starts)
+        humidity_sum = np.add.reduceat(self.humidity[order], starts)
+        pop_max = np.maximum.reduceat(self.pop[order], starts)
+
+        #item closest to noon, first one wins ties: encode (distance, position) in one integer
+        distance = np.abs(self.hour[order].astype(np.int64) - 12)
+        noon = np.minimum.reduceat(distance * count + np.arange(count), starts) % count
+        noon_condition = self.condition_index[order][noon]
+
+        #days are emitted in the order they first appear, like the dict version
+        first_seen = np.minimum.reduceat(order, starts)
+
+        summaries = []
+        for g in np.argsort(first_seen, kind="stable"):
+            date_str = date.fromordinal(int(days[starts[g]])).isoformat()
+            temp_min_c = round(float(temp_min[g]) - 273.15, 1)
+            temp_max_c = round(float(temp_max[g]) - 273.15, 1)
+            condition = self.conditions[noon_condition[g]]
+            summaries.append({
+                "date": date_str,
+                "date_short": date_str[5:],
+                "temp_min_c": temp_min_c,
+                "temp_max_c": temp_max_c,
+                "temp_min_f": round(temp_min_c * 9/5 + 32, 1),
+                "temp_max_f": round(temp_max_c * 9/5 + 32, 1),
+                "condition": condition.main,
+                "description": condition.description,
+                "icon": condition.icon,
+                "icon_url": f"https://openweathermap.org/img/wn/{condition.icon}@2x.png",
+                "humidity_avg": round(int(humidity_sum[g]) / int(sizes[g])),
+                "precipitation_prob": float(pop_max[g]),
+            })
+
+        return summaries
+
@@ -1,18 +1,53 @@
-import csv
-import io
 from datetime import datetime, date
-from typing import Optional
+from typing import Any, Iterable, Iterator, Optional
+from sqlalchemy import Engine, delete, event, insert, or_, update
 from sqlmodel import Session, create_engine, select, SQLModel
 
+from weather_app.backend.core.config import settings
 from weather_app.backend.models.models import WeatherRecord
 
 
-DATABASE_URL = "sqlite:///weather_app.db"
-engine = create_engine(DATABASE_URL, echo=False)
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    #WAL lets the Reflex workers read while one of them writes instead of queueing on the file lock,
+    #busy_timeout makes a writer wait for the lock rather than fail with "database is locked"
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout * 1000)}")
+    cursor.execute(f"PRAGMA mmap_size={settings.sqlite_mmap_size}")
+    cursor.close()
+
+
+def create_db_engine(url: str) -> Engine:
+    if url.startswith("sqlite"):
+        engine = create_engine(url, echo=False)
+        event.listen(engine, "connect", _set_sqlite_pragmas)
+        return engine
+    
+    #server databases (postgres through psycopg2) get a sized pool, connections are recycled
+    #before the server or a proxy drops them and checked before they're handed out
+    return create_engine(
+        url,
+        echo=False,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=True,
+    )
+
+
+DATABASE_URL = settings.database_url
+engine = create_db_engine(DATABASE_URL)
+
+#rows per executemany and ids per IN (...) list, well under the bound parameter limits of SQLite
+BULK_BATCH_SIZE = 500
 
 
 def init_db():
     SQLModel.metadata.create_all(engine)
+    #create_all skips tables that already exist, so indexes added later are created here
+    for index in WeatherRecord.__table__.indexes:
+        index.create(engine, checkfirst=True)
 
 
 def create_weather_record(
@@ -55,6 +90,44 @@ def get_all_weather_records() -> list[WeatherRecord]:
         return results.all()
 
 
+def _encode_cursor(record: WeatherRecord) -> str:
+    return f"{record.created_at.isoformat()}|{record.id}"
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    created_at, record_id = cursor.rsplit("|", 1)
+    return datetime.fromisoformat(created_at), int(record_id)
+
+
+def get_weather_records_page(
+    limit: int,
+    cursor: Optional[str] = None,
+) -> tuple[list[WeatherRecord], Optional[str]]:
+    #Newest first page of records and the cursor for the next one (None on the last page).
+    #Keyset pagination: each page starts right after the previous page's (created_at, id)
+    #through the index, so later pages cost the same as the first however big the table is
+    statement = select(WeatherRecord).order_by(
+        WeatherRecord.created_at.desc(),
+        WeatherRecord.id.desc(),
+    )
+    if cursor:
+        created_at, record_id = _decode_cursor(cursor)
+        #the redundant "<=" bound lets SQLite start a range scan on the index instead of
+        #walking it from the top to evaluate the OR
+        statement = statement.where(
+            WeatherRecord.created_at <= created_at,
+            or_(WeatherRecord.created_at < created_at, WeatherRecord.id < record_id),
+        )
+    
+    with Session(engine) as session:
+        #one extra row tells whether there is a next page
+        records = session.exec(statement.limit(limit + 1)).all()
+    
+    if len(records) > limit:
+        return records[:limit], _encode_cursor(records[limit - 1])
+    return records, None
+
+
 def get_weather_record_by_id(record_id: int) -> Optional[WeatherRecord]:
     with Session(engine) as session:
         return session.get(WeatherRecord, record_id)
@@ -90,14 +163,80 @@ def update_weather_record(
 
 
 def delete_weather_record(record_id: int) -> bool:
+    #a single DELETE, no need to load the row first
+    return bulk_delete_weather_records(record_ids=[record_id]) > 0
+
+
+def _batches(items: list, size: int = BULK_BATCH_SIZE) -> Iterable[list]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _record_filters(
+    record_ids: Optional[list[int]],
+    location_name: Optional[str],
+    created_before: Optional[datetime],
+) -> list:
+    filters = []
+    if location_name is not None:
+        filters.append(WeatherRecord.location_name == location_name)
+    if created_before is not None:
+        filters.append(WeatherRecord.created_at < created_before)
+    if record_ids is None and not filters:
+        #an empty filter would touch the whole table, that has to be asked for explicitly
+        raise ValueError("Pass record_ids or a filter")
+    return filters
+
+
+def _execute_filtered(statement, record_ids: Optional[list[int]], filters: list) -> int:
+    #runs the statement for every batch of ids (or once without ids) in one transaction
+    #and returns the number of rows it affected
     with Session(engine) as session:
-        record = session.get(WeatherRecord, record_id)
-        if not record:
-            return False
-        
-        session.delete(record)
+        if record_ids is None:
+            affected = session.execute(statement.where(*filters)).rowcount
+        else:
+            affected = sum(
+                session.execute(statement.where(WeatherRecord.id.in_(batch), *filters)).rowcount
+                for batch in _batches(record_ids)
+            )
         session.commit()
-        return True
+    return affected
+
+
+def bulk_create_weather_records(records: Iterable[dict[str, Any]]) -> int:
+    #Inserts every record (dicts with the create_weather_record arguments) in one transaction
+    #and returns how many were inserted. Each batch is one executemany of a single prepared
+    #INSERT, which is an order of magnitude faster than compiling a multi row VALUES statement
+    now = datetime.utcnow()
+    rows = [{"created_at": now, **record} for record in records]
+    with Session(engine) as session:
+        for batch in _batches(rows):
+            session.execute(insert(WeatherRecord), batch)
+        session.commit()
+    return len(rows)
+
+
+def bulk_update_weather_records(
+    values: dict[str, Any],
+    record_ids: Optional[list[int]] = None,
+    location_name: Optional[str] = None,
+    created_before: Optional[datetime] = None,
+) -> int:
+    #Sets values on the records matching the ids and/or filters with set based UPDATEs,
+    #returns the number of updated rows
+    filters = _record_filters(record_ids, location_name, created_before)
+    statement = update(WeatherRecord).values(**values, updated_at=datetime.utcnow())
+    return _execute_filtered(statement, record_ids, filters)
+
+
+def bulk_delete_weather_records(
+    record_ids: Optional[list[int]] = None,
+    location_name: Optional[str] = None,
+    created_before: Optional[datetime] = None,
+) -> int:
+    #Deletes the records matching the ids and/or filters, returns the number of deleted rows
+    filters = _record_filters(record_ids, location_name, created_before)
+    return _execute_filtered(delete(WeatherRecord), record_ids, filters)
 
 
 def validate_date_range(date_from: date, date_to: date) -> tuple[bool, str]:
@@ -117,47 +256,32 @@ def validate_date_range(date_from: date, date_to: date) -> tuple[bool, str]:
     return True, ""
 
 
-def export_records_to_csv() -> str:
-    records = get_all_weather_records()
-    
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    writer.writerow([
-        "ID",
-        "Location",
-        "Latitude",
-        "Longitude",
-        "Date From",
-        "Date To",
-        "Temperature (°C)",
-        "Feels Like (°C)",
-        "Humidity (%)",
-        "Description",
-        "Wind Speed (m/s)",
-        "Created At",
-        "Updated At",
-    ])
-    
-    for record in records:
-        temp_celsius = round(record.temperature_kelvin - 273.15, 1)
-        feels_like_celsius = round(record.temperature_feels_like - 273.15, 1)
-        
-        writer.writerow([
-            record.id,
-            record.location_name,
-            record.latitude,
-            record.longitude,
-            record.date_from.isoformat() if record.date_from else "",
-            record.date_to.isoformat() if record.date_to else "",
-            temp_celsius,
-            feels_like_celsius,
-            record.humidity,
-            record.description,
-            record.wind_speed,
-            record.created_at.strftime("%Y-%m-%d %H:%M:%S") if record.created_at else "",
-            record.updated_at.strftime("%Y-%m-%d %H:%M:%S") if record.updated_at else "",
-        ])
-    
-    return output.getvalue()
+#only the columns the export needs, read as plain rows instead of WeatherRecord objects
+_EXPORT_COLUMNS = (
+    WeatherRecord.id,
+    WeatherRecord.location_name,
+    WeatherRecord.latitude,
+    WeatherRecord.longitude,
+    WeatherRecord.date_from,
+    WeatherRecord.date_to,
+    WeatherRecord.temperature_kelvin,
+    WeatherRecord.temperature_feels_like,
+    WeatherRecord.humidity,
+    WeatherRecord.description,
+    WeatherRecord.wind_speed,
+    WeatherRecord.created_at,
+    WeatherRecord.updated_at,
+)
 
+
+def iter_export_rows(batch_size: int = 1000) -> Iterator[list]:
+    #Yields the export columns of every record, newest first, batch_size rows at a time.
+    #yield_per streams them from the cursor, so memory stays flat however big the table is
+    statement = select(*_EXPORT_COLUMNS).order_by(
+        WeatherRecord.created_at.desc(),
+        WeatherRecord.id.desc(),
+    )
+    with Session(engine) as session:
+        result = session.execute(statement.execution_options(yield_per=batch_size))
+        for batch in result.partitions():
+            yield batch
@@ -0,0 +1,299 @@
+import csv
+import io
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Callable, Iterator, Optional
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from weather_app.backend.services.database import iter_export_rows
+
+
+#(field name, CSV / Markdown header) of every exported column, in order
+COLUMNS = [
+    ("id", "ID"),
+    ("location_name", "Location"),
+    ("latitude", "Latitude"),
+    ("longitude", "Longitude"),
+    ("date_from", "Date From"),
+    ("date_to", "Date To"),
+    ("temperature_c", "Temperature (°C)"),
+    ("feels_like_c", "Feels Like (°C)"),
+    ("humidity", "Humidity (%)"),
+    ("description", "Description"),
+    ("wind_speed", "Wind Speed (m/s)"),
+    ("created_at", "Created At"),
+    ("updated_at", "Updated At"),
+]
+FIELDS = [name for name, _ in COLUMNS]
+
+
+@dataclass
+class ColumnBatch:
+    #One batch of export rows as one array per field, so conversions run once per column
+    #instead of once per row. Dates stay date/datetime objects, each format renders them
+    id: np.ndarray
+    location_name: list[str]
+    latitude: np.ndarray
+    longitude: np.ndarray
+    date_from: list[Optional[date]]
+    date_to: list[Optional[date]]
+    temperature_c: np.ndarray
+    feels_like_c: np.ndarray
+    humidity: np.ndarray
+    description: list[str]
+    wind_speed: np.ndarray
+    created_at: list[Optional[datetime]]
+    updated_at: list[Optional[datetime]]
+
+    @classmethod
+    def from_rows(cls, rows: list) -> "ColumnBatch":
+        (
+            ids, location_names, latitudes, longitudes, dates_from, dates_to,
+            temperatures, feels_like, humidity, descriptions, wind_speed, created_at, updated_at,
+        ) = zip(*rows)
+        return cls(
+            id=np.array(ids, dtype=np.int64),
+            location_name=list(location_names),
+            latitude=np.array(latitudes, dtype=np.float64),
+            longitude=np.array(longitudes, dtype=np.float64),
+            date_from=list(dates_from),
+            date_to=list(dates_to),
+            temperature_c=np.round(np.array(temperatures, dtype=np.float64) - 273.15, 1),
+            feels_like_c=np.round(np.array(feels_like, dtype=np.float64) - 273.15, 1),
+            humidity=np.array(humidity, dtype=np.int64),
+            description=list(descriptions),
+            wind_speed=np.array(wind_speed, dtype=np.float64),
+            created_at=list(created_at),
+            updated_at=list(updated_at),
+        )
+
+    def rows(self, render_date: Callable, render_datetime: Callable) -> Iterator[tuple]:
+        #back to one tuple per record in FIELDS order, for the row based formats
+        return zip(
+            self.id.tolist(),
+            self.location_name,
+            self.latitude.tolist(),
+            self.longitude.tolist(),
+            map(render_date, self.date_from),
+            map(render_date, self.date_to),
+            self.temperature_c.tolist(),
+            self.feels_like_c.tolist(),
+            self.humidity.tolist(),
+            self.description,
+            self.wind_speed.tolist(),
+            map(render_datetime, self.created_at),
+            map(render_datetime, self.updated_at),
+        )
+
+
+def iter_column_batches(batch_size: int = 1000) -> Iterator[ColumnBatch]:
+    #the row source every format reads from
+    for rows in iter_export_rows(batch_size):
+        yield ColumnBatch.from_rows(rows)
+
+
+def _iso_date(value: Optional[date]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def _iso_datetime(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat(sep=" ", timespec="seconds") if value else None
+
+
+def _csv_date(value: Optional[date]) -> str:
+    return value.isoformat() if value else ""
+
+
+def _csv_datetime(value: Optional[datetime]) -> str:
+    return value.strftime("%Y-%m-%d %H:%M:%S") if value else ""
+
+
+def write_csv(batches: Iterator[ColumnBatch]) -> Iterator[bytes]:
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow([header for _, header in COLUMNS])
+    yield output.getvalue().encode()
+
+    for batch in batches:
+        output.seek(0)
+        output.truncate()
+        writer.writerows(batch.rows(_csv_date, _csv_datetime))
+        yield output.getvalue().encode()
+
+
+def _json_objects(batch: ColumnBatch) -> Iterator[str]:
+    for row in batch.rows(_iso_date, _iso_datetime):
+        yield json.dumps(dict(zip(FIELDS, row)), ensure_ascii=False, separators=(",", ":"))
+
+
+def write_ndjson(batches: Iterator[ColumnBatch]) -> Iterator[bytes]:
+    for batch in batches:
+        yield "".join(f"{line}\n" for line in _json_objects(batch)).encode()
+
+
+def write_json(batches: Iterator[ColumnBatch]) -> Iterator[bytes]:
+    #one JSON array, written an element at a time
+    separator = "["
+    for batch in batches:
+        chunk = []
+        for line in _json_objects(batch):
+            chunk.append(separator)
+            chunk.append(line)
+            separator = ","
+        yield "".join(chunk).encode()
+    yield b"[]" if separator == "[" else b"]"
+
+
+def write_xml(batches: Iterator[ColumnBatch]) -> Iterator[bytes]:
+    yield b'<?xml version="1.0" encoding="UTF-8"?>\n<records>\n'
+    for batch in batches:
+        chunk = []
+        for row in batch.rows(_iso_date, _iso_datetime):
+            chunk.append("  <record>")
+            for name, value in zip(FIELDS, row):
+                if value is None:
+                    chunk.append(f"<{name}/>")
+                else:
+                    chunk.append(f"<{name}>{escape(str(value))}</{name}>")
+            chunk.append("</record>\n")
+        yield "".join(chunk).encode()
+    yield b"</records>\n"
+
+
+def _markdown_cell(value) -> str:
+    return "" if value is None else str(value).replace("|", "\\|").replace("\n", " ")
+
+
+def write_markdown(batches: Iterator[ColumnBatch]) -> Iterator[bytes]:
+    headers = [header for _, header in COLUMNS]
+    yield (
+        "| " + " | ".join(headers) + " |\n"
+        + "|" + "|".join("---" for _ in headers) + "|\n"
+    ).encode()
+    for batch in batches:
+        yield "".join(
+            "| " + " | ".join(_markdown_cell(value) for value in row) + " |\n"
+            for row in batch.rows(_iso_date, _iso_datetime)
+        ).encode()
+
+
+class _ChunkSink(io.RawIOBase):
+    #write only file object that keeps what was written until it's drained, so pyarrow
+    #writers can stream their output instead of building the whole file in memory
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+_ARROW_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("location_name", pa.string()),
+    ("latitude", pa.float64()),
+    ("longitude", pa.float64()),
+    ("date_from", pa.date32()),
+    ("date_to", pa.date32()),
+    ("temperature_c", pa.float64()),
+    ("feels_like_c", pa.float64()),
+    ("humidity", pa.int64()),
+    ("description", pa.string()),
+    ("wind_speed", pa.float64()),
+    ("created_at", pa.timestamp("us")),
+    ("updated_at", pa.timestamp("us")),
+])
+
+
+def _arrow_table(batch: ColumnBatch):
+    #the numeric columns go to arrow as whole numpy arrays, without a python object per value
+    return pa.table(
+        {
+            "id": batch.id,
+            "location_name": pa.array(batch.location_name, pa.string()),
+            "latitude": batch.latitude,
+            "longitude": batch.longitude,
+            "date_from": pa.array(batch.date_from, pa.date32()),
+            "date_to": pa.array(batch.date_to, pa.date32()),
+            "temperature_c": batch.temperature_c,
+            "feels_like_c": batch.feels_like_c,
+            "humidity": batch.humidity,
+            "description": pa.array(batch.description, pa.string()),
+            "wind_speed": batch.wind_speed,
+            "created_at": pa.array(batch.created_at, pa.timestamp("us")),
+            "updated_at": pa.array(batch.updated_at, pa.timestamp("us")),
+        },
+        schema=_ARROW_SCHEMA,
+    )
+
+
+def write_arrow(batches: Iterator[ColumnBatch]) -> Iterator[bytes]:
+    #Arrow IPC stream format: a schema message, then one record batch message per batch
+    sink = _ChunkSink()
+    with pa.ipc.new_stream(sink, _ARROW_SCHEMA) as writer:
+        for batch in batches:
+            writer.write_table(_arrow_table(batch))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def write_parquet(batches: Iterator[ColumnBatch]) -> Iterator[bytes]:
+    #one row group per batch, the footer with the row group index is written on close
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, _ARROW_SCHEMA, compression="zstd") as writer:
+        for batch in batches:
+            writer.write_table(_arrow_table(batch))
+            yield sink.drain()
+    yield sink.drain()
+
+
+@dataclass(frozen=True)
+class ExportFormat:
+    name: str
+    label: str
+    extension: str
+    media_type: str
+    write: Callable[[Iterator[ColumnBatch]], Iterator[bytes]]
+
+
+EXPORT_FORMATS: dict[str, ExportFormat] = {}
+
+
+def register_format(export_format: ExportFormat) -> None:
+    EXPORT_FORMATS[export_format.name] = export_format
+
+
+register_format(ExportFormat("csv", "CSV", "csv", "text/csv; charset=utf-8", write_csv))
+register_format(ExportFormat("json", "JSON", "json", "application/json", write_json))
+register_format(ExportFormat("ndjson", "NDJSON", "ndjson", "application/x-ndjson", write_ndjson))
+register_format(ExportFormat("xml", "XML", "xml", "application/xml", write_xml))
+register_format(ExportFormat("markdown", "Markdown", "md", "text/markdown; charset=utf-8", write_markdown))
+register_format(ExportFormat(
+    "arrow", "Arrow IPC", "arrows", "application/vnd.apache.arrow.stream", write_arrow,
+))
+register_format(ExportFormat(
+    "parquet", "Parquet", "parquet", "application/vnd.apache.parquet", write_parquet,
+))
+
+
+def export_records(format_name: str, batch_size: int = 1000) -> Iterator[bytes]:
+    #Every record in the given format, one chunk per batch of rows
+    return EXPORT_FORMATS[format_name].write(iter_column_batches(batch_size))
@@ -0,0 +1,172 @@
+import bisect
+import csv
+import heapq
+import math
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+
+BUNDLED_GAZETTEER = Path(__file__).resolve().parent.parent / "data" / "cities.tsv"
+
+#column positions in a GeoNames dump (cities500.txt, cities15000.txt, allCountries.txt...)
+_NAME, _ASCII_NAME, _LAT, _LON, _COUNTRY, _ADMIN1, _POPULATION = 1, 2, 4, 5, 8, 10, 14
+#GeoNames file mapping "country.admin1" codes ("GB.ENG") to region names ("England")
+ADMIN1_CODES_FILE = "admin1CodesASCII.txt"
+
+_EARTH_RADIUS_KM = 6371.0
+#size in degrees of the grid cells used for reverse lookups
+_CELL_DEGREES = 1.0
+
+
+class GazetteerEntry(NamedTuple):
+    name: str
+    country: str
+    state: Optional[str]
+    latitude: float
+    longitude: float
+    population: int
+
+
+def normalize_name(value: str) -> str:
+    #casefold and strip accents so "zur" matches "Zürich"
+    decomposed = unicodedata.normalize("NFKD", value.strip().casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    #great circle (haversine) distance
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (
+        math.sin((phi2 - phi1) / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    )
+    return 2 * _EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _cell(latitude: float, longitude: float) -> tuple[int, int]:
+    return (
+        math.floor(latitude / _CELL_DEGREES),
+        math.floor((longitude % 360) / _CELL_DEGREES),
+    )
+
+
+class Gazetteer:
+    #Offline prefix index over place names: a sorted array of normalized names searched
+    #with bisect, results ranked by population. Entries are also bucketed in a lat/lon grid
+    #so coordinates can be turned back into the nearest place without the geocoding API
+
+    def __init__(
+        self,
+        entries: list[GazetteerEntry],
+        aliases: Optional[list[tuple[str, int]]] = None,
+    ):
+        self.entries = entries
+
+        #every entry is indexed by its name, plus any (alias, entry index) pairs
+        pairs = {(normalize_name(entry.name), index) for index, entry in enumerate(entries)}
+        for alias, index in aliases or []:
+            pairs.add((normalize_name(alias), index))
+        pairs = sorted(pairs)
+        self._keys = [key for key, _ in pairs]
+        self._ids = [index for _, index in pairs]
+
+        #short prefixes match many names, so ranked results are memoized per prefix
+        self._search = lru_cache(maxsize=4096)(self._search_prefix)
+
+        self._grid: dict[tuple[int, int], list[int]] = {}
+        for index, entry in enumerate(entries):
+            self._grid.setdefault(_cell(entry.latitude, entry.longitude), []).append(index)
+
+    @classmethod
+    def from_geonames(cls, path: str | Path, admin1_path: Optional[str | Path] = None) -> "Gazetteer":
+        #dumps only carry admin1 codes, they are turned into the names the geocoding API returns
+        #through admin1_path (default: admin1CodesASCII.txt next to the dump). Without that file
+        #the state is left out rather than showing a code like "ENG"
+        admin1_path = Path(admin1_path or Path(path).with_name(ADMIN1_CODES_FILE))
+        admin1_names = load_admin1_names(admin1_path) if admin1_path.is_file() else {}
+
+        entries = []
+        aliases = []
+        with open(path, encoding="utf-8", newline="") as f:
+            for row in csv.reader(f, delimiter="\t", quoting=csv.QUOTE_NONE):
+                if len(row) <= _POPULATION:
+                    continue
+                entry = GazetteerEntry(
+                    name=row[_NAME],
+                    country=row[_COUNTRY],
+                    state=admin1_names.get(f"{row[_COUNTRY]}.{row[_ADMIN1]}"),
+                    latitude=float(row[_LAT]),
+                    longitude=float(row[_LON]),
+                    population=int(row[_POPULATION] or 0),
+                )
+                entries.append(entry)
+
+                #index the ascii spelling too ("Lodz" for "Łódź")
+                if row[_ASCII_NAME]:
+                    aliases.append((row[_ASCII_NAME], len(entries) - 1))
+        return cls(entries, aliases)
+
+    def _search_prefix(self, prefix: str, limit: int) -> tuple[GazetteerEntry, ...]:
+        start = bisect.bisect_left(self._keys, prefix)
+        end = bisect.bisect_left(self._keys, prefix + "\uffff", lo=start)
+
+        #a place matched through both its name and an alias is returned once
+        matches = set(self._ids[start:end])
+        ranked = heapq.nlargest(limit, matches, key=lambda i: self.entries[i].population)
+        return tuple(self.entries[i] for i in ranked)
+
+    def search(self, query: str, limit: int = 5) -> list[GazetteerEntry]:
+        prefix = normalize_name(query)
+        if not prefix:
+            return []
+        return list(self._search(prefix, limit))
+
+    def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        max_distance_km: float,
+    ) -> Optional[GazetteerEntry]:
+        #only the cells that can hold a place within max_distance_km are scanned
+        lat_span = math.ceil(math.degrees(max_distance_km / _EARTH_RADIUS_KM) / _CELL_DEGREES)
+        #a degree of longitude shrinks towards the poles, so more columns are needed there
+        widest = min(89.0, abs(latitude) + lat_span * _CELL_DEGREES)
+        lon_span = min(
+            math.ceil(lat_span / math.cos(math.radians(widest))),
+            math.ceil(180 / _CELL_DEGREES),
+        )
+
+        row, col = _cell(latitude, longitude)
+        columns = round(360 / _CELL_DEGREES)
+        best, best_distance = None, max_distance_km
+        for r in range(row - lat_span, row + lat_span + 1):
+            for c in {(col + offset) % columns for offset in range(-lon_span, lon_span + 1)}:
+                for index in self._grid.get((r, c), ()):
+                    entry = self.entries[index]
+                    distance = distance_km(latitude, longitude, entry.latitude, entry.longitude)
+                    if distance <= best_distance:
+                        best, best_distance = entry, distance
+        return best
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+def load_admin1_names(path: str | Path) -> dict[str, str]:
+    #"country.admin1" code -> region name, from a GeoNames admin1CodesASCII.txt
+    names = {}
+    with open(path, encoding="utf-8", newline="") as f:
+        for row in csv.reader(f, delimiter="\t", quoting=csv.QUOTE_NONE):
+            if len(row) >= 2 and row[1]:
+                names[row[0]] = row[1]
+    return names
+
+
+def load_gazetteer(path: Optional[str] = None, admin1_path: Optional[str] = None) -> Optional[Gazetteer]:
+    #A missing or unreadable file just disables offline autocomplete
+    try:
+        return Gazetteer.from_geonames(path or BUNDLED_GAZETTEER, admin1_path)
+    except (OSError, ValueError):
+        return None
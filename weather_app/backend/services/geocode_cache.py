@@ -0,0 +1,100 @@
+import atexit
+import json
+import os
+import tempfile
+import time
+from dataclasses import asdict
+from typing import Any, Callable, Optional
+
+from weather_app.backend.services.cache import TTLCache
+from weather_app.backend.services.gazetteer import normalize_name
+
+
+class GeocodeCache:
+    #Caches geocoding results by normalized query. A result set that wasn't truncated also
+    #answers longer queries ("Lon" -> "London") by filtering it, and the whole cache can be
+    #kept in a JSON file so it survives restarts
+
+    def __init__(
+        self,
+        ttl: float,
+        max_size: int,
+        factory: Callable[..., Any],
+        path: Optional[str] = None,
+    ):
+        self._cache = TTLCache(ttl=ttl, max_size=max_size)
+        self.factory = factory
+        self.path = path
+        self.prefix_hits = 0
+
+        if path:
+            self.load()
+            atexit.register(self.save)
+
+    def get(self, query: str, limit: int) -> Optional[list]:
+        key = normalize_name(query)
+        entry = self._cache.get(key)
+        if entry is not None:
+            results, complete = entry
+            if complete or len(results) >= limit:
+                return results[:limit]
+
+        if "," in key:
+            return None
+
+        for end in range(len(key) - 1, 1, -1):
+            entry = self._cache.peek(key[:end])
+            if entry is None:
+                continue
+
+            results, complete = entry
+            if not complete:
+                return None
+
+            filtered = [r for r in results if normalize_name(r.name).startswith(key)]
+            #the geocoding API doesn't match by prefix, so an empty filter isn't a real answer
+            if not filtered:
+                return None
+
+            #a subset of a complete result set is complete too, keep it for the next exact lookup
+            self._cache.set(key, (filtered, True))
+            self.prefix_hits += 1
+            return filtered[:limit]
+
+        return None
+
+    def set(self, query: str, results: list, limit: int) -> None:
+        self._cache.set(normalize_name(query), (results, len(results) < limit))
+
+    def stats(self) -> dict:
+        return {**self._cache.stats(), "prefix_hits": self.prefix_hits}
+
+    def load(self) -> None:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        now = time.time()
+        for key, expires_at, complete, results in saved:
+            if expires_at > now:
+                self._cache.set(
+                    key,
+                    ([self.factory(**r) for r in results], complete),
+                    ttl=expires_at - now,
+                )
+
+    def save(self) -> None:
+        now = time.time()
+        saved = [
+            [key, now + seconds_left, complete, [asdict(r) for r in results]]
+            for key, (results, complete), seconds_left in self._cache.items()
+        ]
+
+        #write to a temp file and rename so a crash never leaves a half written cache
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(saved, f)
+        os.replace(tmp_path, self.path)
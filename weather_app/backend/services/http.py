@@ -0,0 +1,56 @@
+import asyncio
+import importlib.util
+import threading
+import weakref
+from typing import Optional
+
+import httpx
+from weather_app.backend.core.config import settings
+
+
+_client: Optional[httpx.Client] = None
+#pooled async connections belong to the event loop that opened them, so there is one client per loop
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+_lock = threading.Lock()
+
+
+def client_options() -> dict:
+    #http2 needs the optional h2 package (pip install "httpx[http2]"), without it we stay on http/1.1
+    http2 = settings.http2 and importlib.util.find_spec("h2") is not None
+    return {
+        "timeout": httpx.Timeout(
+            settings.weather_api_timeout,
+            connect=settings.http_connect_timeout,
+            read=settings.http_read_timeout or settings.weather_api_timeout,
+        ),
+        "limits": httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry,
+        ),
+        "http2": http2,
+    }
+
+
+def get_client() -> httpx.Client:
+    #one pooled client per process so connections (and TLS sessions) are reused across services
+    global _client
+    with _lock:
+        if _client is None or _client.is_closed:
+            _client = httpx.Client(**client_options())
+        return _client
+
+
+def get_async_client() -> httpx.AsyncClient:
+    #Must be called from inside the event loop the client will be used on. A later
+    #asyncio.run() gets its own client instead of one tied to an already closed loop
+    loop = asyncio.get_running_loop()
+    with _lock:
+        for other in [other for other in _async_clients if other.is_closed()]:
+            del _async_clients[other]
+        client = _async_clients.get(loop)
+        if client is None or client.is_closed:
+            client = _async_clients[loop] = httpx.AsyncClient(**client_options())
+        return client
@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import time
+from enum import IntEnum
+from typing import Optional
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    AUTOCOMPLETE = 1
+    BACKGROUND = 2
+
+
+class RateLimitExceeded(Exception):
+    pass
+
+
+class TokenBucket:
+    #Process wide token bucket for the API key quota. Lower priorities may only take a token
+    #while the bucket is above their floor, so the last tokens are always left for interactive
+    #weather requests. A call that would wait longer than its priority allows is dropped
+
+    #share of the bucket each priority has to leave untouched
+    FLOORS = {
+        Priority.INTERACTIVE: 0.0,
+        Priority.AUTOCOMPLETE: 0.25,
+        Priority.BACKGROUND: 0.5,
+    }
+    #seconds a call may wait for a token before it is dropped
+    MAX_WAIT = {
+        Priority.INTERACTIVE: 10.0,
+        Priority.AUTOCOMPLETE: 0.5,
+        Priority.BACKGROUND: 30.0,
+    }
+
+    def __init__(self, rate_per_minute: float, capacity: int):
+        if capacity < 1:
+            raise ValueError("Rate limit burst must be at least 1")
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.dropped = {priority: 0 for priority in Priority}
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self, priority: Priority) -> float:
+        #takes a token and returns 0, or returns how long until one is available for this priority
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+
+            #a small bucket can't keep a floor and still hold a token above it, there every
+            #priority may take the last token rather than lower ones never getting one
+            needed = min(self.capacity, self.FLOORS[priority] * self.capacity + 1)
+            if self.tokens >= needed:
+                self.tokens -= 1
+                return 0.0
+            return (needed - self.tokens) / self.rate
+
+    def _drop(self, priority: Priority) -> None:
+        with self._lock:
+            self.dropped[priority] += 1
+        raise RateLimitExceeded(f"API rate limit reached for {priority.name.lower()} requests")
+
+    def acquire(
+        self,
+        priority: Priority = Priority.INTERACTIVE,
+        max_wait: Optional[float] = None,
+    ) -> None:
+        #max_wait shortens how long the priority may wait, MAX_WAIT when None
+        limit = self.MAX_WAIT[priority] if max_wait is None else min(max_wait, self.MAX_WAIT[priority])
+        deadline = time.monotonic() + limit
+        while True:
+            wait = self._take(priority)
+            if not wait:
+                return
+            if time.monotonic() + wait > deadline:
+                self._drop(priority)
+            time.sleep(wait)
+
+    async def acquire_async(
+        self,
+        priority: Priority = Priority.INTERACTIVE,
+        max_wait: Optional[float] = None,
+    ) -> None:
+        #max_wait shortens how long the priority may wait, MAX_WAIT when None
+        limit = self.MAX_WAIT[priority] if max_wait is None else min(max_wait, self.MAX_WAIT[priority])
+        deadline = time.monotonic() + limit
+        while True:
+            wait = self._take(priority)
+            if not wait:
+                return
+            if time.monotonic() + wait > deadline:
+                self._drop(priority)
+            await asyncio.sleep(wait)
+
+    def stats(self) -> dict:
+        return {
+            "tokens": round(self.tokens, 2),
+            "capacity": self.capacity,
+            "dropped": {priority.name.lower(): count for priority, count in self.dropped.items()},
+        }
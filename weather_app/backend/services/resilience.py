@@ -0,0 +1,109 @@
+import random
+import threading
+import time
+from typing import Optional
+
+
+class RetryPolicy:
+    #Jittered exponential backoff for idempotent GETs. Retries are paid from a budget that
+    #every request tops up by budget_ratio, so retries can't multiply load on a failing upstream
+
+    def __init__(
+        self,
+        max_attempts: int,
+        base_delay: float,
+        max_delay: float,
+        budget_ratio: float,
+        budget_cap: float = 10.0,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget_ratio = budget_ratio
+        self.budget_cap = budget_cap
+        self.retries = 0
+        self.budget_exhausted = 0
+        self._budget = budget_cap
+        self._lock = threading.Lock()
+
+    def record_request(self) -> None:
+        with self._lock:
+            self._budget = min(self.budget_cap, self._budget + self.budget_ratio)
+
+    def next_delay(self, attempt: int) -> Optional[float]:
+        #seconds to wait before retrying after a failed attempt (0 based), None to give up
+        if attempt + 1 >= self.max_attempts:
+            return None
+
+        with self._lock:
+            if self._budget < 1:
+                self.budget_exhausted += 1
+                return None
+            self._budget -= 1
+            self.retries += 1
+
+        #"full jitter": spreads retries from many clients instead of retrying in lockstep
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def stats(self) -> dict:
+        return {
+            "retries": self.retries,
+            "budget_exhausted": self.budget_exhausted,
+            "budget": round(self._budget, 2),
+        }
+
+
+class CircuitBreaker:
+    #Opens after failure_threshold consecutive upstream failures and rejects calls for
+    #reset_timeout seconds, then lets a single probe through (half open) to test recovery
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.rejected = 0
+        self.opened_count = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+
+            now = time.monotonic()
+            if now - self._opened_at < self.reset_timeout:
+                self.rejected += 1
+                return False
+
+            #restarting the timer means a probe that never reports back can't wedge the breaker
+            self.state = self.HALF_OPEN
+            self._opened_at = now
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.opened_count += 1
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "rejected": self.rejected,
+            "opened": self.opened_count,
+        }
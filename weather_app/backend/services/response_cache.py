@@ -0,0 +1,163 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Hashable, Mapping, Optional
+
+_MAX_AGE = re.compile(r"max-age\s*=\s*(\d+)")
+
+
+def response_expiry(
+    headers: Mapping[str, str],
+    data: Any,
+    ttl: float,
+    min_ttl: float,
+    now: Optional[float] = None,
+) -> float:
+    #Wall clock time until which a response is fresh. Cache-Control can only shorten ttl, and an
+    #observation time (dt) anchors it to when the data was measured instead of when we fetched it.
+    #An overdue observation is still kept for min_ttl, so a silent station isn't refetched constantly
+    now = time.time() if now is None else now
+    cache_control = headers.get("cache-control", "").lower()
+    if "no-store" in cache_control or "no-cache" in cache_control:
+        return now
+
+    expires_at = now + ttl
+    max_age = _MAX_AGE.search(cache_control)
+    if max_age:
+        age = headers.get("age", "0")
+        expires_at = min(expires_at, now + int(max_age.group(1)) - (int(age) if age.isdigit() else 0))
+
+    observed_at = data.get("dt") if isinstance(data, dict) else None
+    if isinstance(observed_at, (int, float)) and observed_at <= now:
+        expires_at = min(expires_at, max(observed_at + ttl, now + min_ttl))
+
+    return expires_at
+
+
+class ResponseCache:
+    #Raw response bodies in a SQLite file that every worker process opens, so a restart, a
+    #deploy or a newly spawned worker starts warm instead of sending its whole working set
+    #upstream. Expired rows are kept until the size limit evicts them, for serving stale.
+    #The cache is optional: a locked or broken file is a miss on read and a skipped store
+    #on write, never an error for the request that hit it
+
+    #writes between two evictions, which run on a background thread
+    PRUNE_EVERY = 100
+
+    def __init__(self, path: str, max_size: int, timeout: float = 1.0):
+        self.path = path
+        self.max_size = max_size
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._writes = 0
+        self._local = threading.local()
+        self._prune_requested = threading.Event()
+        self._pruner: Optional[threading.Thread] = None
+        self._pruner_lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        #sqlite connections can't be shared between threads, each thread opens its own
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            try:
+                #WAL lets every worker read while one of them writes
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute("PRAGMA synchronous=NORMAL")
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    " key TEXT PRIMARY KEY, body BLOB NOT NULL, expires_at REAL NOT NULL)"
+                )
+                #eviction orders by expiry
+                connection.execute(
+                    "CREATE INDEX IF NOT EXISTS responses_expires_at ON responses (expires_at)"
+                )
+            except sqlite3.Error:
+                connection.close()
+                raise
+            self._local.connection = connection
+        return connection
+
+    def _key(self, key: Hashable) -> str:
+        return json.dumps(key)
+
+    def get(self, key: Hashable, allow_stale: bool = False) -> Optional[tuple[bytes, float]]:
+        #(body, expires_at) of the stored response, None when missing, expired or unreadable
+        try:
+            row = self._connection().execute(
+                "SELECT body, expires_at FROM responses WHERE key = ?", (self._key(key),)
+            ).fetchone()
+        except sqlite3.Error:
+            self.errors += 1
+            row = None
+        if row is None or (not allow_stale and row[1] <= time.time()):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return bytes(row[0]), row[1]
+
+    def set(self, key: Hashable, body: bytes, expires_at: float) -> None:
+        try:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO responses (key, body, expires_at) VALUES (?, ?, ?)",
+                (self._key(key), body, expires_at),
+            )
+        except sqlite3.Error:
+            self.errors += 1
+            return
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            self._request_prune()
+
+    def _request_prune(self) -> None:
+        #the eviction deletes across the whole table, so it runs off the request path
+        with self._pruner_lock:
+            if self._pruner is None:
+                self._pruner = threading.Thread(target=self._prune_loop, daemon=True)
+                self._pruner.start()
+        self._prune_requested.set()
+
+    def _prune_loop(self) -> None:
+        while True:
+            self._prune_requested.wait()
+            self._prune_requested.clear()
+            self.prune()
+
+    def prune(self) -> None:
+        #evicts the entries that expire first once the table is over max_size
+        try:
+            self._connection().execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_size,),
+            )
+        except sqlite3.Error:
+            self.errors += 1
+
+    def clear(self) -> None:
+        self._connection().execute("DELETE FROM responses")
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def __len__(self) -> int:
+        try:
+            return self._connection().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "size": len(self),
+            "max_size": self.max_size,
+        }
@@ -0,0 +1,76 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    #Concurrent calls with the same key share one execution: the first caller runs fn,
+    #the others block until it finishes and get the same result (or exception)
+
+    def __init__(self):
+        self.shared = 0
+        self._calls: dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                self.shared += 1
+
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class AsyncSingleFlight:
+    #asyncio version of SingleFlight. The shared work runs in its own task, so a caller
+    #being cancelled (e.g. the user navigated away) doesn't cancel it for everyone else
+
+    def __init__(self):
+        self.shared = 0
+        self._calls: dict[Hashable, asyncio.Task] = {}
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            #mark the exception as retrieved in case every waiter was cancelled
+            task.exception()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            self.shared += 1
+
+        return await asyncio.shield(task)
@@ -7,6 +7,7 @@ from weather_app.frontend.components.error_message import error_message, success
 from weather_app.frontend.components.save_weather import save_weather_form
 from weather_app.frontend.components.history import edit_modal
 from weather_app.frontend.components.geolocation import geolocation_button
+from weather_app.backend.services.export import EXPORT_FORMATS
 from weather_app.frontend.state import WeatherState
 
 
@@ -68,19 +69,34 @@ def sidebar_history() -> rx.Component:
                     align="center",
                 ),
                 rx.spacer(),
+                rx.select.root(
+                    rx.select.trigger(
+                        variant="ghost",
+                        color="white",
+                    ),
+                    rx.select.content(
+                        *[
+                            rx.select.item(export_format.label, value=export_format.name)
+                            for export_format in EXPORT_FORMATS.values()
+                        ],
+                    ),
+                    value=WeatherState.export_format,
+                    on_change=WeatherState.set_export_format,
+                    size="1",
+                ),
                 rx.tooltip(
                     rx.icon_button(
                         rx.icon("download", size=16, color="white"),
                         size="1",
                         variant="outline",
                         color="white",
-                        on_click=WeatherState.export_csv,
+                        on_click=WeatherState.export_history,
                         cursor="pointer",
                         background="rgba(255,255,255,0.15)",
                         border="1px solid rgba(255,255,255,0.4)",
                         _hover={"background": "rgba(255,255,255,0.25)"},
                     ),
-                    content="Export to CSV",
+                    content="Export history",
                 ),
                 width="100%",
                 align="center",
@@ -92,6 +108,18 @@ def sidebar_history() -> rx.Component:
                         WeatherState.weather_records,
                         history_record_item,
                     ),
+                    rx.cond(
+                        WeatherState.has_more_records,
+                        rx.button(
+                            "Load more",
+                            size="1",
+                            variant="ghost",
+                            color="white",
+                            width="100%",
+                            on_click=WeatherState.load_more_records,
+                            cursor="pointer",
+                        ),
+                    ),
                     gap="2",
                     width="100%",
                     max_height="500px",
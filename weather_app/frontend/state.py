@@ -1,19 +1,23 @@
+import asyncio
 import reflex as rx
 from datetime import date, datetime
 from typing import Optional, TypedDict
 
+from weather_app.backend.core.config import settings
 from weather_app.backend.services.api import (
-    weather_service,
+    async_weather_service,
+    Location,
     WeatherAPIError,
 )
+from weather_app.backend.models.models import WeatherRecord
+from weather_app.backend.services.export import EXPORT_FORMATS
 from weather_app.backend.services.database import (
     init_db,
     create_weather_record,
-    get_all_weather_records,
+    get_weather_records_page,
     update_weather_record,
     delete_weather_record,
     validate_date_range,
-    export_records_to_csv,
 )
 
 
@@ -35,6 +39,37 @@ class ForecastDay(TypedDict):
 
 init_db()
 
+#pending autocomplete lookup per client, so a new keystroke can cancel the previous one
+_autocomplete_tasks: dict[str, asyncio.Task] = {}
+
+
+def _location_to_dict(loc: Location) -> dict:
+    return {
+        "name": loc.name,
+        "country": loc.country,
+        "state": loc.state or "",
+        "display_name": loc.display_name,
+        "latitude": loc.latitude,
+        "longitude": loc.longitude,
+    }
+
+
+def _record_to_dict(r: WeatherRecord) -> dict:
+    return {
+        "id": r.id,
+        "location_name": r.location_name,
+        "latitude": r.latitude,
+        "longitude": r.longitude,
+        "date_from": r.date_from.isoformat() if r.date_from else "",
+        "date_to": r.date_to.isoformat() if r.date_to else "",
+        "temperature": round(r.temperature_kelvin - 273.15, 1),
+        "humidity": r.humidity,
+        "description": r.description,
+        "icon_code": r.icon_code,
+        "wind_speed": r.wind_speed,
+        "created_at": r.created_at.strftime("%Y-%m-%d %H:%M") if r.created_at else "",
+    }
+
 
 class WeatherState(rx.State):
     
@@ -42,6 +77,9 @@ class WeatherState(rx.State):
     location_suggestions: list[dict] = []  
     is_searching: bool = False
     
+    #backend only: latest keystroke number, results of older ones are dropped
+    _search_seq: int = 0
+    
     selected_location_name: str = ""
     selected_latitude: float = 0.0
     selected_longitude: float = 0.0
@@ -69,8 +107,13 @@ class WeatherState(rx.State):
     date_to: str = ""
     
     weather_records: list[dict] = []
+    has_more_records: bool = False
+    export_format: str = "csv"
     show_history: bool = False
     
+    #backend only: keyset cursor of the next history page
+    _records_cursor: str = ""
+    
     editing_record_id: Optional[int] = None
     edit_location_name: str = ""
     edit_date_from: str = ""
@@ -133,29 +176,45 @@ class WeatherState(rx.State):
     def on_search_change(self, value: str):
         self.search_query = value
         self._clear_messages()
+        self._search_seq += 1
         
         if len(value) < 2:
             self.location_suggestions = []
+            self.is_searching = False
             return
         
         self.is_searching = True
+        return WeatherState.autocomplete(value, self._search_seq)
+
+    @rx.event(background=True)
+    async def autocomplete(self, query: str, seq: int):
+        token = self.router.session.client_token
+        previous = _autocomplete_tasks.get(token)
+        if previous is not None:
+            previous.cancel()
+        task = asyncio.current_task()
+        _autocomplete_tasks[token] = task
         
         try:
-            locations = weather_service.search_locations(value, limit=5)
-            self.location_suggestions = [
-                {
-                    "name": loc.name,
-                    "country": loc.country,
-                    "state": loc.state or "",
-                    "display_name": loc.display_name,
-                    "latitude": loc.latitude,
-                    "longitude": loc.longitude,
-                }
-                for loc in locations
-            ]
+            #debounce: a newer keystroke cancels this task while it sleeps or waits on the API
+            await asyncio.sleep(settings.autocomplete_debounce)
+            locations = await async_weather_service.search_locations(
+                query, limit=settings.autocomplete_limit
+            )
+        except asyncio.CancelledError:
+            return
         except Exception:
-            self.location_suggestions = []
+            locations = []
         finally:
+            if _autocomplete_tasks.get(token) is task:
+                del _autocomplete_tasks[token]
+        
+        async with self:
+            #responses can arrive out of order, only the latest query is applied
+            if seq != self._search_seq:
+                return
+            
+            self.location_suggestions = [_location_to_dict(loc) for loc in locations]
             self.is_searching = False
     
     @rx.event
@@ -165,10 +224,11 @@ class WeatherState(rx.State):
         self.selected_longitude = location["longitude"]
         self.search_query = location["display_name"]
         self.location_suggestions = []  
+        self._search_seq += 1
         return WeatherState.fetch_weather
     
     @rx.event
-    def fetch_weather(self):
+    async def fetch_weather(self):
         if not self.selected_latitude and not self.selected_longitude:
             self.error_message = "Please select a location first"
             return
@@ -177,9 +237,16 @@ class WeatherState(rx.State):
         self._clear_messages()
         
         try:
-            weather = weather_service.get_current_weather_by_coords(
-                self.selected_latitude,
-                self.selected_longitude
+            #current weather and forecast are independent, so we request both at the same time
+            weather, forecast_days = await asyncio.gather(
+                async_weather_service.get_current_weather_by_coords(
+                    self.selected_latitude,
+                    self.selected_longitude
+                ),
+                async_weather_service.get_daily_forecast_by_coords(
+                    self.selected_latitude,
+                    self.selected_longitude
+                ),
             )
             
             self.location_display = f"{weather.location_name}, {weather.country}"
@@ -197,11 +264,7 @@ class WeatherState(rx.State):
             self.date_from = today
             self.date_to = today
             
-            forecast = weather_service.get_forecast_by_coords(
-                self.selected_latitude,
-                self.selected_longitude
-            )
-            self.forecast_days = forecast.get_daily_summary()
+            self.forecast_days = forecast_days
             
         except WeatherAPIError as e:
             self.error_message = str(e)
@@ -222,13 +285,23 @@ class WeatherState(rx.State):
         self.selected_longitude = coords.get("longitude", 0.0)
         self.selected_location_name = "Current loc"
         self.search_query = "Current location"
+
+        #the nearest known place (offline) only names the position, the weather is still fetched
+        #and saved for the device coordinates, nearby users share cache entries via snap_coords
+        place = async_weather_service.reverse_geocode(self.selected_latitude, self.selected_longitude)
+        if place is not None:
+            self.selected_location_name = place.display_name
+            self.search_query = place.display_name
+
         self.location_suggestions = []
+        self._search_seq += 1
         return WeatherState.fetch_weather
     
     @rx.event
     def clear_search(self):
         self.search_query = ""
         self.location_suggestions = []
+        self._search_seq += 1
         self.has_weather_data = False
         self.forecast_days = []
         self._clear_messages()
@@ -282,25 +355,28 @@ class WeatherState(rx.State):
     
     @rx.event
     def load_weather_records(self):
+        #(re)loads only the first page, the sidebar fetches more on demand
         try:
-            records = get_all_weather_records()
-            self.weather_records = [
-                {
-                    "id": r.id,
-                    "location_name": r.location_name,
-                    "latitude": r.latitude,
-                    "longitude": r.longitude,
-                    "date_from": r.date_from.isoformat() if r.date_from else "",
-                    "date_to": r.date_to.isoformat() if r.date_to else "",
-                    "temperature": round(r.temperature_kelvin - 273.15, 1),
-                    "humidity": r.humidity,
-                    "description": r.description,
-                    "icon_code": r.icon_code,
-                    "wind_speed": r.wind_speed,
-                    "created_at": r.created_at.strftime("%Y-%m-%d %H:%M") if r.created_at else "",
-                }
-                for r in records
-            ]
+            records, cursor = get_weather_records_page(settings.history_page_size)
+            self.weather_records = [_record_to_dict(r) for r in records]
+            self._records_cursor = cursor or ""
+            self.has_more_records = cursor is not None
+        except Exception as e:
+            self.error_message = f"Error loading records: {str(e)}"
+    
+    @rx.event
+    def load_more_records(self):
+        if not self._records_cursor:
+            return
+        
+        try:
+            records, cursor = get_weather_records_page(
+                settings.history_page_size,
+                self._records_cursor,
+            )
+            self.weather_records = self.weather_records + [_record_to_dict(r) for r in records]
+            self._records_cursor = cursor or ""
+            self.has_more_records = cursor is not None
         except Exception as e:
             self.error_message = f"Error loading records: {str(e)}"
     
@@ -383,10 +459,17 @@ class WeatherState(rx.State):
             self.error_message = f"Error deleting record: {str(e)}"
     
     @rx.event
-    def export_csv(self):
-        try:
-            csv_content = export_records_to_csv()
-            filename = f"weather_history_{date.today().isoformat()}.csv"
-            return rx.download(data=csv_content, filename=filename)
-        except Exception as e:
-            self.error_message = f"Error exporting CSV: {str(e)}"
+    def set_export_format(self, value: str):
+        if value in EXPORT_FORMATS:
+            self.export_format = value
+    
+    @rx.event
+    def export_history(self):
+        #the backend streams the file from /export/<format> and names it in its headers. It is
+        #served on the backend port, which rx.download can't point at (it only takes frontend
+        #paths), so the browser opens the url itself and saves the attachment
+        export_format = EXPORT_FORMATS[self.export_format]
+        return rx.redirect(
+            f"{rx.config.get_config().api_url}/export/{export_format.name}",
+            is_external=True,
+        )
@@ -1,6 +1,7 @@
 import reflex as rx
+from weather_app.backend.routes import api
 from weather_app.frontend.pages.index import index
 from weather_app.frontend.state import WeatherState  
 
-app = rx.App()
+app = rx.App(api_transformer=api)
 app.add_page(index)